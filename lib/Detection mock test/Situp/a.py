@@ -1,7 +1,7 @@
 ##################################################
+# Run from `lib/Detection mock test` as `python -m Situp.a`
 import cv2
-import mediapipe as mp
-from PoseModule import poseDetector as PoseDetector
+import engine
 import tkinter.filedialog as fd
 from tkinter import *
 ###################################################
@@ -10,82 +10,21 @@ win.title("Sit up")
 width=800
 height=800
 win.geometry("%dx%d" % (width, height))
-mpDraw=mp.solutions.drawing_utils
-mpPose=mp.solutions.pose
-pose=mpPose.Pose()
-detector = PoseDetector()
+# Warm the pose graph up while the window is on screen
+detector = engine.shared_detector()
+detector.warmUp()
 ################################################
 def live():
-    counter=0
-    stage=0
     cap = cv2.VideoCapture(0)
-    while True:
-        success, img = cap.read()
-        img=cv2.flip(img, 2)
-        img = detector.findPose(img)
-        lmlist=detector.findPosition(img,False)
-        imgRGB=cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        results=pose.process(imgRGB)
-        # detector.findPosition(img, bboxWithHands=False)
-        if results.pose_landmarks:
-            # mpDraw.draw_landmarks(img, results.pose_landmarks,mpPose.POSE_CONNECTIONS)
-            points={}
-            for id, lm in enumerate(results.pose_landmarks.landmark):
-                h,w,c=img.shape
-                cx,cy=int(lm.x*w),int(lm.y*h)
-                points[id]=(cx,cy)
-            angle=detector.findAngle(img,11,23,25)         
-            if angle >= 117 or angle >= 136:
-                    stage = "down"
-
-            if (angle <= 89 or angle <= 102) and stage =='down':
-                stage="up"
-                counter +=1
-                
-        cv2.putText(img,f'{counter}',(10,50),cv2.FONT_HERSHEY_COMPLEX,2,(0,255,255),2) 
-        cv2.imshow("Situp",img)  
-        if(cv2.waitKey(1) & 0xFF==ord('x')):
-            break 
-    cap.release()
-    cv2.destroyAllWindows()
+    engine.run(cap, detector, engine.SitUpCounter(), "Situp")
 ####################################################
 def path_select():
     global explore,cap
     explore = fd.askopenfilename(title='Choose a file of any type', filetypes=[("All files", ".mp4")])# explore = filedialog.askopenfilename()
     
     ######################################
-    counter=0
-    stage=0
     cap = cv2.VideoCapture(explore)
-    while True:
-        success, img = cap.read()
-        img=cv2.flip(img, 2)
-        img = detector.findPose(img)
-        lmlist=detector.findPosition(img,False)
-        imgRGB=cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        results=pose.process(imgRGB)
-        # detector.findPosition(img, bboxWithHands=False)
-        if results.pose_landmarks:
-            # mpDraw.draw_landmarks(img, results.pose_landmarks,mpPose.POSE_CONNECTIONS)
-            points={}
-            for id, lm in enumerate(results.pose_landmarks.landmark):
-                h,w,c=img.shape
-                cx,cy=int(lm.x*w),int(lm.y*h)
-                points[id]=(cx,cy)
-            angle=detector.findAngle(img,11,23,25)         
-            if angle >= 117 or angle >= 136:
-                    stage = "down"
-
-            if (angle <= 89 or angle <= 102) and stage =='down':
-                stage="up"
-                counter +=1
-                
-        cv2.putText(img,f'{counter}',(10,50),cv2.FONT_HERSHEY_COMPLEX,2,(0,255,255),2) 
-        cv2.imshow("Situp",img)  
-        if(cv2.waitKey(1) & 0xFF==ord('x')):
-            break 
-    cap.release()
-    cv2.destroyAllWindows()
+    engine.run(cap, detector, engine.SitUpCounter(), "Situp")
     ######################################
 #########################################################
 
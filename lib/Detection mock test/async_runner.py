@@ -0,0 +1,281 @@
+"""Asyncio counter that publishes rep and feedback events without stalling frames.
+
+Usage:
+    python async_runner.py [--exercise pushup|situp|pullup] [--source 0|clip.mp4]
+                           [--endpoint http://127.0.0.1:8090/events] [--headless]
+                           [--stub] [--stub-delay 0.5] [--batch 20] [--queue 500]
+
+Capture runs on its own thread into a FrameBuffer like realtime_pipeline.
+Each frame's inference runs in a single-thread executor, so the event loop
+stays free while MediaPipe works. A rep or feedback change becomes an event
+that is put on the publisher's queue without waiting. The publisher
+coroutine POSTs events as JSON batches of up to `--batch`, each on the
+network thread, and backs off while the backend fails.
+
+The queue is bounded by `--queue`. When it is full, the oldest feedback
+event is dropped, then the oldest rep event. Rep events carry the running
+count, so a later one makes up for a dropped one. A slow or down backend
+costs queued events, never frame time.
+
+`--stub` serves a local stand-in for the app backend on the endpoint's
+port. It answers after `--stub-delay` seconds and keeps what it received.
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+import urllib.request
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import cv2
+
+import engine
+from realtime_pipeline import FrameBuffer, capture_frames, is_file_source
+
+
+class EventPublisher:
+    """Bounded event queue drained in batches by a coroutine, sending on its own thread."""
+
+    def __init__(self, endpoint, batch_size=20, max_queue=500, flush_interval=0.2,
+                 timeout=5.0, max_backoff=5.0):
+        self.endpoint = endpoint
+        self.batch_size = batch_size
+        self.max_queue = max_queue
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.events = deque()
+        self.ready = asyncio.Event()
+        self.closed = False
+        self.network = ThreadPoolExecutor(1, thread_name_prefix='publish')
+        self.sent = 0
+        self.batches = 0
+        self.failures = 0
+        self.dropped = {'feedback': 0, 'rep': 0}
+        self.max_depth = 0
+
+    def publish(self, event):
+        """Queues an event and returns at once, dropping old events when full."""
+        if len(self.events) >= self.max_queue:
+            self._drop()
+        self.events.append(event)
+        self.max_depth = max(self.max_depth, len(self.events))
+        if len(self.events) >= self.batch_size:
+            self.ready.set()
+
+    def _drop(self):
+        for i, event in enumerate(self.events):
+            if event['type'] == 'feedback':
+                del self.events[i]
+                self.dropped['feedback'] += 1
+                return
+        self.events.popleft()
+        self.dropped['rep'] += 1
+
+    def _post(self, batch):
+        data = json.dumps({'events': batch}).encode()
+        request = urllib.request.Request(self.endpoint, data,
+                                         {'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    async def run(self):
+        """Sends batches until closed and drained."""
+        loop = asyncio.get_running_loop()
+        backoff = 0.1
+        while not (self.closed and not self.events):
+            if len(self.events) < self.batch_size and not self.closed:
+                # Wait for a full batch, but no longer than flush_interval
+                try:
+                    await asyncio.wait_for(self.ready.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            self.ready.clear()
+            if not self.events:
+                continue
+            batch = [self.events[i] for i in range(min(self.batch_size, len(self.events)))]
+            try:
+                await loop.run_in_executor(self.network, self._post, batch)
+            except Exception as e:
+                self.failures += 1
+                if self.closed:
+                    print(f"publish failed while closing ({e!r}), {len(self.events)} events lost")
+                    break
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+            backoff = 0.1
+            # Events dropped while the batch was in flight shift the queue
+            for event in batch:
+                if self.events and self.events[0] is event:
+                    self.events.popleft()
+            self.sent += len(batch)
+            self.batches += 1
+        self.network.shutdown(wait=False)
+
+    def close(self):
+        self.closed = True
+        self.ready.set()
+
+    def stats(self):
+        return {'sent': self.sent, 'batches': self.batches, 'failures': self.failures,
+                'dropped': dict(self.dropped), 'queued': len(self.events),
+                'max_depth': self.max_depth}
+
+
+class AsyncRunner:
+    """Counts on a source with inference in an executor and events published asynchronously."""
+
+    def __init__(self, source, counter, publisher, detector=None, buffer_size=2):
+        self.source = source
+        self.counter = counter
+        self.publisher = publisher
+        self.detector = detector or engine.shared_detector()
+        self.buffer = FrameBuffer(buffer_size)
+        self.inference = ThreadPoolExecutor(1, thread_name_prefix='inference')
+        self.session = uuid.uuid4().hex[:12]
+        self.running = False
+        self.show = True
+        # Seconds per frame spent in the executor, and from capture to result
+        self.step_times = deque(maxlen=1000)
+        self.latency = deque(maxlen=1000)
+
+    def _step(self):
+        """Takes the newest frame and counts on it, on the inference thread."""
+        item = self.buffer.get_latest()
+        if item is None:
+            return None
+        frame_id, captured_at, img = item
+        start = time.perf_counter()
+        img, angles = engine.process_frame(self.detector, self.counter, img, draw=self.show)
+        done = time.perf_counter()
+        self.step_times.append(done - start)
+        self.latency.append(done - captured_at)
+        return frame_id, img
+
+    def _event(self, kind, frame_id):
+        return {'type': kind, 'session': self.session, 'exercise': self.counter.name,
+                'count': self.counter.count, 'feedback': self.counter.feedback,
+                'frame': frame_id, 'time': time.time()}
+
+    async def run(self, show=True):
+        """Counts until the source ends or the exit key is pressed and returns the count."""
+        loop = asyncio.get_running_loop()
+        self.show = show
+        self.detector.warmUp()
+        cap = cv2.VideoCapture(self.source)
+        self.running = True
+        capture = threading.Thread(target=capture_frames, daemon=True,
+                                   args=(cap, self.buffer, lambda: self.running,
+                                         is_file_source(self.source)))
+        capture.start()
+        publishing = asyncio.create_task(self.publisher.run())
+        count, feedback = self.counter.count, self.counter.feedback
+        try:
+            while self.running:
+                result = await loop.run_in_executor(self.inference, self._step)
+                if result is None:
+                    break
+                frame_id, img = result
+                if self.counter.count != count:
+                    count = self.counter.count
+                    self.publisher.publish(self._event('rep', frame_id))
+                elif self.counter.feedback != feedback:
+                    self.publisher.publish(self._event('feedback', frame_id))
+                feedback = self.counter.feedback
+                if show:
+                    self.counter.draw(img)
+                    cv2.imshow(self.counter.window_name, img)
+                    if cv2.waitKey(1) & 0xFF == ord(self.counter.exit_key):
+                        break
+        finally:
+            self.running = False
+            self.buffer.close()
+            capture.join(timeout=2)
+            cap.release()
+            self.inference.shutdown()
+            self.publisher.close()
+            await publishing
+            if show:
+                cv2.destroyAllWindows()
+        return self.counter.count
+
+    def stats(self):
+        return {'frames': len(self.step_times), 'count': self.counter.count,
+                'step_ms': engine.percentiles(self.step_times),
+                'latency_ms': engine.percentiles(self.latency),
+                'publisher': self.publisher.stats()}
+
+
+class StubBackend:
+    """Local stand-in for the app backend that accepts event batches after `delay` seconds."""
+
+    def __init__(self, port=8090, delay=0.0):
+        self.port = port
+        self.delay = delay
+        self.events = []
+        self.lock = threading.Lock()
+
+    def start(self):
+        backend = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                time.sleep(backend.delay)
+                with backend.lock:
+                    backend.events.extend(body['events'])
+                self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', self.port), Handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.httpd.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--exercise', choices=sorted(engine.COUNTERS), default='pushup')
+    parser.add_argument('--source', default='0', help='camera index or video file')
+    parser.add_argument('--endpoint', default='http://127.0.0.1:8090/events')
+    parser.add_argument('--headless', action='store_true', help='count without a window')
+    parser.add_argument('--stub', action='store_true', help='serve a local stub backend')
+    parser.add_argument('--stub-delay', type=float, default=0.0,
+                        help='seconds the stub takes to answer')
+    parser.add_argument('--batch', type=int, default=20, help='events per POST')
+    parser.add_argument('--queue', type=int, default=500, help='events kept while the backend lags')
+    args = parser.parse_args()
+
+    stub = None
+    if args.stub:
+        stub = StubBackend(urlparse(args.endpoint).port or 80, args.stub_delay)
+        stub.start()
+    source = engine.capture_source(args.source)
+
+    async def session():
+        publisher = EventPublisher(args.endpoint, args.batch, args.queue)
+        runner = AsyncRunner(source, engine.create_counter(args.exercise), publisher)
+        await runner.run(show=not args.headless)
+        return runner
+
+    runner = asyncio.run(session())
+    print(json.dumps(runner.stats()))
+    if stub:
+        reps = [event['count'] for event in stub.events if event['type'] == 'rep']
+        print(f"stub received {len(stub.events)} events ({len(reps)} reps, "
+              f"last count {max(reps, default=0):g})")
+        stub.stop()
+
+
+if __name__ == '__main__':
+    main()
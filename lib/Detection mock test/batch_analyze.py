@@ -0,0 +1,239 @@
+"""Headless batch analysis of recorded workout clips.
+
+Usage:
+    python batch_analyze.py CLIP_OR_DIR [CLIP_OR_DIR ...] --exercise pushup
+                            [--workers N] [--out results]
+                            [--chunk-seconds 60] [--overlap 1.0]
+
+Clips are spread over a process pool. Every worker builds its own
+poseDetector once and reuses it for all the clips it is handed, with a
+fresh MediaPipe graph for each one (about 0.2 s to build), so a clip's
+result does not depend on which worker ran it or what it ran before.
+A clip given twice is analyzed once. Results are written to `<out>.json` (reps and
+feedback events per clip, and a quality record per rep from
+engine/quality.py) and `<out>.csv` (one summary row per clip).
+
+With `--chunk-seconds`, long clips are also split into time ranges of
+that length, and the ranges go to the pool too, so one long class
+recording keeps every worker busy. A worker seeks its own capture to
+`--overlap` seconds before its range and infers on that warm-up stretch
+without keeping it, so MediaPipe's tracking and smoothing have settled
+when the range starts. OpenCV seeks frame-exactly by decoding from the
+keyframe before the seek point. Workers return the joint angles of their
+range, and the counter then runs once over the ranges joined back
+together. A rep that straddles a boundary is therefore counted exactly
+once, just as in one sequential pass.
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from multiprocessing import Pool
+
+import cv2
+import numpy as np
+
+import engine
+
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv', '.webm')
+EXERCISES = tuple(sorted(engine.COUNTERS))
+
+# One detector per worker process, built by init_worker
+detector = None
+
+
+def init_worker(detector_kwargs):
+    """Builds the worker's own detector and keeps OpenCV single threaded."""
+    global detector
+    cv2.setNumThreads(1)
+    detector = engine.poseDetector(**detector_kwargs)
+
+
+def find_clips(paths):
+    """Expands directories into the video files they contain."""
+    clips = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(VIDEO_EXTENSIONS):
+                    clips.append(os.path.join(path, name))
+        else:
+            clips.append(path)
+    return clips
+
+
+def plan_ranges(path, chunk_seconds=0, overlap=1.0):
+    """Splits a clip into (start, stop, warmup) frame ranges of `chunk_seconds` each.
+
+    `warmup` is how many frames before `start` are inferred without
+    being kept. Without `chunk_seconds` the whole clip is one range.
+    """
+    cap = cv2.VideoCapture(path)
+    frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    cap.release()
+    step = round(chunk_seconds * fps)
+    if not step or frames <= step:
+        return [(0, None, 0)]
+    warmup = round(overlap * fps)
+    starts = list(range(0, frames, step))
+    # The last range reads to the end, in case the frame count is short
+    return [(start, stop, min(warmup, start))
+            for start, stop in zip(starts, starts[1:] + [None])]
+
+
+def analyze_range(job):
+    """Infers on one frame range of a clip and returns its joint angles.
+
+    Rows of the (frames, joints) angle array are NaN where no pose was
+    found. The detector's graph, crop and smoothing are reset first, since
+    the worker's last job may have been a different clip or range and
+    MediaPipe would otherwise track on from where that one ended.
+    """
+    path, exercise, start, stop, warmup = job
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        return {'clip': path, 'start': start, 'error': 'could not open clip'}
+    video_fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    if start - warmup:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start - warmup)
+    detector.close()
+    detector.roi = None
+    if detector.smoother is not None:
+        detector.smoother.reset()
+
+    counter = engine.create_counter(exercise)
+    rows = []
+    index = start - warmup
+    begin = time.perf_counter()
+    while stop is None or index < stop:
+        ret, img = cap.read()
+        if not ret:
+            break
+        img, angles = engine.process_frame(detector, counter, img, draw=False)
+        if index >= start:
+            rows.append(angles if angles is not None else [np.nan] * len(counter.joints))
+        index += 1
+    elapsed = time.perf_counter() - begin
+    cap.release()
+    return {'clip': path, 'start': start, 'fps': video_fps, 'seconds': elapsed,
+            'warmup': warmup, 'angles': np.array(rows, np.float64).reshape(-1, len(counter.joints))}
+
+
+def count_reps(path, exercise, angles, video_fps):
+    """Runs a fresh counter over a clip's joint angles and returns its result record."""
+    counter = engine.create_counter(exercise)
+    reps, events = [], []
+    last_feedback = None
+    for frame, row in enumerate(angles.tolist()):
+        if row[0] != row[0]:
+            # NaN, no pose on this frame
+            continue
+        t = round(frame / video_fps, 3)
+        prev = counter.count
+        counter.update(row)
+        # push-ups count in halves, a rep is done when it lands on a whole number
+        if counter.count != prev and counter.count == int(counter.count):
+            reps.append(t)
+        feedback = counter.feedback
+        if feedback is not None and feedback != last_feedback:
+            events.append({'time': t, 'feedback': feedback})
+            last_feedback = feedback
+    return {
+        'clip': path,
+        'exercise': exercise,
+        'reps': int(counter.count),
+        'rep_times': reps,
+        'events': events,
+        'frames': len(angles),
+        'duration': round(len(angles) / video_fps, 3),
+        # Tempo in seconds rather than the records' frames
+        'rep_quality': [dict(record, seconds=round(record['frames'] / video_fps, 3),
+                             flex_seconds=round(record['flex_frames'] / video_fps, 3),
+                             extend_seconds=round(record['extend_frames'] / video_fps, 3))
+                        for record in counter.metrics.records],
+    }
+
+
+def merge_ranges(path, exercise, parts):
+    """Joins a clip's range results in order and counts over them."""
+    errors = [part['error'] for part in parts if 'error' in part]
+    if errors:
+        return {'clip': path, 'exercise': exercise, 'error': errors[0]}
+    parts.sort(key=lambda part: part['start'])
+    result = count_reps(path, exercise, np.concatenate([part['angles'] for part in parts]),
+                        parts[0]['fps'])
+    elapsed = sum(part['seconds'] for part in parts)
+    result['chunks'] = len(parts)
+    result['processing_seconds'] = round(elapsed, 3)
+    result['processing_fps'] = round(result['frames'] / elapsed, 1) if elapsed > 0 else 0.0
+    return result
+
+
+def write_results(results, out):
+    """Writes the full results as JSON and a per-clip summary as CSV."""
+    with open(out + '.json', 'w') as f:
+        json.dump(results, f, indent=2)
+    fields = ['clip', 'exercise', 'reps', 'rep_times', 'frames', 'duration', 'chunks',
+              'processing_seconds', 'processing_fps', 'error']
+    with open(out + '.csv', 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
+        writer.writeheader()
+        for result in results:
+            row = dict(result)
+            row['rep_times'] = ' '.join(str(t) for t in result.get('rep_times', []))
+            writer.writerow(row)
+
+
+def run_batch(clips, exercise, workers=None, detector_kwargs=None, chunk_seconds=0,
+              overlap=1.0):
+    """Analyzes the clips over a pool of `workers` processes, in ranges of `chunk_seconds`.
+
+    `processing_seconds` of a clip adds up its ranges' inference time,
+    warm-up included, whichever workers ran them.
+    """
+    workers = workers or os.cpu_count() or 1
+    # Ranges are gathered by clip, so a clip listed twice would be merged with itself
+    unique = {}
+    for clip in clips:
+        unique.setdefault(os.path.abspath(clip), clip)
+    clips = list(unique.values())
+    jobs = [(clip, exercise) + r for clip in clips
+            for r in plan_ranges(clip, chunk_seconds, overlap)]
+    parts = {clip: [] for clip in clips}
+    with Pool(workers, initializer=init_worker, initargs=(detector_kwargs or {},)) as pool:
+        for part in pool.imap_unordered(analyze_range, jobs):
+            parts[part['clip']].append(part)
+    return [merge_ranges(clip, exercise, parts[clip]) for clip in sorted(clips)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='+', help='clips or directories of clips')
+    parser.add_argument('--exercise', choices=EXERCISES, default='pushup')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='worker processes (default: one per core)')
+    parser.add_argument('--complexity', type=int, default=1, choices=(0, 1, 2))
+    parser.add_argument('--out', default='results', help='output path without extension')
+    parser.add_argument('--chunk-seconds', type=float, default=0,
+                        help='split clips into ranges this long for the pool (default: whole clips)')
+    parser.add_argument('--overlap', type=float, default=1.0,
+                        help='seconds inferred before each range to settle tracking')
+    args = parser.parse_args()
+
+    clips = find_clips(args.paths)
+    if not clips:
+        parser.error('no clips found')
+    start = time.perf_counter()
+    results = run_batch(clips, args.exercise, args.workers,
+                        {'complexity': args.complexity}, args.chunk_seconds, args.overlap)
+    write_results(results, args.out)
+    elapsed = time.perf_counter() - start
+    for result in results:
+        print(f"{result['clip']}: {result.get('reps', result.get('error'))}")
+    print(f"{len(results)} clips in {elapsed:.1f}s -> {args.out}.json, {args.out}.csv")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,395 @@
+"""Reproducible throughput and latency benchmark for the detection scripts.
+
+Usage:
+    python benchmark.py [--frames 150] [--complexity 0 1 2] [--out benchmark.json]
+                        [--compare previous.json] [--tolerance 10] [--no-startup]
+
+Needs no camera or clip: the frames come from synthetic.pushup_frames and
+the counter fixtures from synthetic.pushup_landmarks/situp_landmarks, so
+two runs on the same machine see exactly the same input.
+
+Every model complexity is measured in its own spawned process, so its
+peak RSS is its own and no MediaPipe graph outlives its run. Per frame,
+findPose, findPosition, findAngle (the three push-up joints), the push-up
+state machine and the sit-up counter are timed separately, after
+`--warmup` untimed frames, and the memory process_frame allocates and
+frees within a frame is traced for the push-up and (mirrored) sit-up
+counters. `init_ms` is importing mediapipe, building
+the graph and its first inference. The counters are also timed alone over
+the landmark fixtures, both frame by frame and through count_clip, and
+the landmark smoother is timed per frame over fixtures with heavy jitter,
+counting them raw and smoothed.
+
+Startup is measured by running `python -m engine pushup` headless on a
+synthetic clip until the first rep, with and without the background
+warm-up, and reading its `startup` line: seconds from engine import to
+the first frame, the warm graph, the first pose and the first count,
+plus the wall time from process launch to the first count.
+
+Results (p50/p95/p99 per stage in ms, fps, peak RSS) are printed and
+written as JSON. With `--compare`, the p50 of every stage is checked
+against an earlier results file and the exit status is 1 when any stage
+got slower by more than `--tolerance` percent.
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+import engine
+from engine import pose as pm
+from engine import pushup, situp
+import landmark_cache
+import synthetic
+
+PERCENTILES = (50, 95, 99)
+
+
+def summarize(times_ns):
+    """Returns the p50/p95/p99 and mean of a list of durations, in milliseconds."""
+    ms = np.asarray(times_ns, np.float64) / 1e6
+    if len(ms) == 0:
+        return {}
+    stats = {f"p{p}": round(float(v), 4) for p, v in zip(PERCENTILES, np.percentile(ms, PERCENTILES))}
+    stats['mean'] = round(float(ms.mean()), 4)
+    stats['calls'] = len(ms)
+    return stats
+
+
+def peak_rss_mb():
+    """Returns this process's peak resident set size in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return round(peak / (1 << 20 if sys.platform == 'darwin' else 1 << 10), 1)
+
+
+def bench_detector(complexity, frames=150, warmup=10, size=(640, 480)):
+    """Times every per-frame stage with a detector of the given complexity.
+
+    Meant to run in a fresh process; returns a JSON-ready dict, with an
+    `error` entry instead of timings when the detector cannot be built
+    (the complexity 0 and 2 models are downloaded on first use).
+    """
+    # Enough reps for any frame count, rendered up front so drawing is not timed
+    reps = (warmup + frames) // 60 + 1
+    images = list(itertools.islice(synthetic.pushup_frames(reps, w=size[0], h=size[1]),
+                                   warmup + frames))
+    start = time.perf_counter_ns()
+    try:
+        detector = pm.poseDetector(complexity=complexity)
+        detector.warmUp(background=False)
+    except Exception as e:
+        return {'complexity': complexity, 'error': repr(e), 'peak_rss_mb': peak_rss_mb()}
+    init_ns = time.perf_counter_ns() - start
+
+    stages = {name: [] for name in ('findPose', 'findPosition', 'findAngle',
+                                    'pushup_counter', 'situp_counter', 'frame')}
+    count, direction, form = 0, 0, 0
+    stage, counter = 0, 0
+    found = 0
+    clock = time.perf_counter_ns
+    for i, img in enumerate(images):
+        t0 = clock()
+        detector.findPose(img, False)
+        t1 = clock()
+        lmList = detector.findPosition(img, False)
+        t2 = clock()
+        t3 = t4 = t5 = t2
+        if len(lmList) != 0:
+            elbow, shoulder, hip = (detector.findAngle(img, *joints, draw=False)
+                                    for joints in pushup.PUSHUP_JOINTS)
+            t3 = clock()
+            feedback, count, direction, form = pushup.update_feedback_and_count(
+                elbow, shoulder, hip, direction, count, form)
+            t4 = clock()
+            stage, counter = situp.update_stage_and_count(hip, stage, counter)
+            t5 = clock()
+        if i < warmup:
+            continue
+        stages['findPose'].append(t1 - t0)
+        stages['findPosition'].append(t2 - t1)
+        if len(lmList) != 0:
+            found += 1
+            stages['findAngle'].append(t3 - t2)
+            stages['pushup_counter'].append(t4 - t3)
+            stages['situp_counter'].append(t5 - t4)
+        stages['frame'].append(t5 - t0)
+
+    total = sum(stages['frame']) / 1e9
+    allocated = frame_allocations(detector, images[warmup:warmup + 30])
+    return {
+        'complexity': complexity,
+        'frames': frames,
+        'detected': found,
+        'pushups': count,
+        'init_ms': round(init_ns / 1e6, 1),
+        'fps': round(frames / total, 2) if total else None,
+        'peak_rss_mb': peak_rss_mb(),
+        'allocated_kb': allocated,
+        'stages': {name: summarize(times) for name, times in stages.items()},
+    }
+
+
+def frame_allocations(detector, images):
+    """Returns the median KB allocated and freed again per process_frame call, per exercise.
+
+    Each frame is drawn on, and the sit-up counter mirrors it, so this
+    covers the whole frame path of the interactive scripts.
+    """
+    allocated = {}
+    for name in ('pushup', 'situp'):
+        counter = engine.create_counter(name)
+        peaks = []
+        tracemalloc.start()
+        for img in images:
+            img = img.copy()
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            engine.process_frame(detector, counter, img)
+            peaks.append(tracemalloc.get_traced_memory()[1] - base)
+        tracemalloc.stop()
+        allocated[name] = round(float(np.median(peaks)) / 1024, 1) if peaks else None
+    return allocated
+
+
+def bench_counters(reps=50, noise=0.002, repeat=20):
+    """Times the counters alone over the landmark fixtures.
+
+    count_clip takes well under a millisecond, so it is timed `repeat` times.
+    """
+    results = {}
+    clock = time.perf_counter_ns
+    for name, fixture, joints in (
+            ('pushup', synthetic.pushup_landmarks, pushup.PUSHUP_JOINTS),
+            ('situp', synthetic.situp_landmarks, (situp.SITUP_JOINTS,))):
+        landmarks, meta = fixture(reps, noise=noise)
+        found, angles = landmark_cache.clip_angles(landmarks, meta, joints)
+        rows = angles.tolist()
+        times = []
+        if name == 'pushup':
+            count, direction, form = 0, 0, 0
+            for elbow, shoulder, hip in rows:
+                t0 = clock()
+                feedback, count, direction, form = pushup.update_feedback_and_count(
+                    elbow, shoulder, hip, direction, count, form)
+                times.append(clock() - t0)
+            count_clip = lambda: pushup.count_clip(*angles.T)
+        else:
+            stage, count = 0, 0
+            for (angle,) in rows:
+                t0 = clock()
+                stage, count = situp.update_stage_and_count(angle, stage, count)
+                times.append(clock() - t0)
+            count_clip = lambda: situp.count_clip(angles[:, 0])
+        clip_times = []
+        for _ in range(repeat):
+            t0 = clock()
+            clip_count, rep_frames = count_clip()
+            clip_times.append(clock() - t0)
+        clip = summarize(clip_times)
+        results[name] = {
+            'frames': len(rows),
+            'count': count,
+            'clip_count': clip_count,
+            'step': summarize(times),
+            'count_clip': clip,
+            'count_clip_fps': round(len(rows) / (clip['p50'] / 1e3)),
+        }
+    return results
+
+
+def bench_smoother(reps=50, noise=0.02, window=3):
+    """Times LandmarkSmoother per frame and counts jittery fixtures raw and smoothed."""
+    results = {}
+    clock = time.perf_counter_ns
+    for name, fixture in (('pushup', synthetic.pushup_landmarks),
+                          ('situp', synthetic.situp_landmarks)):
+        landmarks, meta = fixture(reps, noise=noise)
+        smoothed = landmarks.copy()
+        smoother = engine.LandmarkSmoother(window)
+        times = []
+        for frame in smoothed:
+            t0 = clock()
+            smoother.update(frame)
+            times.append(clock() - t0)
+        counter = engine.create_counter(name)
+        counts = {}
+        for label, data in (('raw', landmarks), ('smoothed', smoothed)):
+            found, angles = landmark_cache.clip_angles(data, meta, counter.joints)
+            counts[label] = counter.count_clip(angles)[0]
+        results[name] = {'frames': len(smoothed), 'reps': reps, 'noise': noise,
+                         'window': window, 'update': summarize(times), 'count': counts}
+    return results
+
+
+def bench_startup(runs=3):
+    """Times `python -m engine pushup` from launch to the first count, with and without warm-up."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        clip = os.path.join(tmp, 'pushups.mp4')
+        synthetic.write_clip(clip, reps=2)
+        for name, extra in (('warmup', []), ('no_warmup', ['--no-warmup'])):
+            samples = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                proc = subprocess.Popen(
+                    [sys.executable, '-m', 'engine', 'pushup', '--source', clip,
+                     '--headless', '--target', '1'] + extra,
+                    cwd=here, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+                for line in proc.stdout:
+                    if line.startswith('startup '):
+                        times = json.loads(line[len('startup '):])
+                        times['first_count_wall'] = round(time.perf_counter() - start, 3)
+                        samples.append(times)
+                proc.wait()
+            if samples:
+                # The median run by first count
+                samples.sort(key=lambda t: t['first_count_wall'])
+                results[name] = samples[len(samples) // 2]
+    return results
+
+
+def environment():
+    import mediapipe as mp
+    return {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'opencv': cv2.__version__,
+        'opencv_threads': cv2.getNumThreads(),
+        'numpy': np.__version__,
+        'mediapipe': mp.__version__,
+    }
+
+
+def run(complexities=(0, 1, 2), frames=150, warmup=10, size=(640, 480), startup=True):
+    """Runs the whole benchmark and returns the results dict."""
+    results = {'environment': environment(),
+               'settings': {'frames': frames, 'warmup': warmup, 'size': list(size)},
+               'detector': {}}
+    ctx = multiprocessing.get_context('spawn')
+    for complexity in complexities:
+        # One process per complexity, so peak RSS is measured per model
+        with ctx.Pool(1) as pool:
+            results['detector'][str(complexity)] = pool.apply(
+                bench_detector, (complexity, frames, warmup, size))
+    results['counters'] = bench_counters()
+    results['smoother'] = bench_smoother()
+    if startup:
+        results['startup'] = bench_startup()
+    return results
+
+
+def flatten(results):
+    """Returns {stage path: p50 ms} for every timed stage in a results dict."""
+    flat = {}
+    for complexity, entry in results.get('detector', {}).items():
+        for stage, stats in entry.get('stages', {}).items():
+            if stats:
+                flat[f"complexity {complexity} {stage}"] = stats['p50']
+    for name, entry in results.get('counters', {}).items():
+        flat[f"{name} step"] = entry['step']['p50']
+        flat[f"{name} count_clip"] = entry['count_clip']['p50']
+    for name, entry in results.get('smoother', {}).items():
+        flat[f"{name} smoother update"] = entry['update']['p50']
+    for name, entry in results.get('startup', {}).items():
+        flat[f"startup {name} first count"] = entry['first_count_wall'] * 1000
+    return flat
+
+
+def compare(results, previous, tolerance=10.0, min_delta_ms=0.01):
+    """Prints the p50 change of every stage and returns the ones over `tolerance` percent.
+
+    Stages that moved by less than `min_delta_ms` are never flagged, as
+    microsecond stages swing by more than any tolerance between runs.
+    """
+    now, before = flatten(results), flatten(previous)
+    regressions = []
+    for stage in sorted(now.keys() & before.keys()):
+        if not before[stage]:
+            continue
+        change = 100 * (now[stage] - before[stage]) / before[stage]
+        flag = ''
+        if change > tolerance and now[stage] - before[stage] >= min_delta_ms:
+            regressions.append(stage)
+            flag = '  REGRESSION'
+        print(f"{stage:<36}{before[stage]:>10.3f}{now[stage]:>10.3f} ms{change:>+8.1f}%{flag}")
+    return regressions
+
+
+def print_results(results):
+    print(f"{'complexity':<12}{'fps':>8}{'init ms':>9}{'RSS MB':>8}  "
+          f"{'stage':<16}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for complexity, entry in results['detector'].items():
+        if 'error' in entry:
+            print(f"{complexity:<12}unavailable: {entry['error']}")
+            continue
+        head = f"{complexity:<12}{entry['fps']:>8.1f}{entry['init_ms']:>9.0f}{entry['peak_rss_mb']:>8.0f}  "
+        for stage, stats in entry['stages'].items():
+            if stats:
+                print(f"{head}{stage:<16}{stats['p50']:>9.3f}{stats['p95']:>9.3f}{stats['p99']:>9.3f}")
+                head = ' ' * 39
+    for name, entry in results['counters'].items():
+        step = entry['step']
+        print(f"{name} counter over {entry['frames']} fixture frames: step p50 {step['p50'] * 1000:.1f}us "
+              f"p99 {step['p99'] * 1000:.1f}us, count_clip {entry['count_clip_fps']:,} frames/s "
+              f"(count {entry['count']:g} / {entry['clip_count']:g})")
+    for complexity, entry in results['detector'].items():
+        if entry.get('allocated_kb'):
+            print(f"complexity {complexity} per-frame allocations: " +
+                  ', '.join(f"{name} {kb:g} KB" for name, kb in entry['allocated_kb'].items()))
+    for name, entry in results.get('smoother', {}).items():
+        update, count = entry['update'], entry['count']
+        print(f"{name} smoother (window {entry['window']}): update p50 {update['p50'] * 1000:.1f}us "
+              f"p99 {update['p99'] * 1000:.1f}us, {entry['reps']} reps with {entry['noise']:g} jitter "
+              f"count {count['raw']:g} raw / {count['smoothed']:g} smoothed")
+    for name, entry in results.get('startup', {}).items():
+        print(f"startup ({name}): first count {entry['first_count_wall']:.2f}s after launch, "
+              f"graph ready {entry['graph_ready']:.2f}s, first pose {entry['first_pose']:.2f}s "
+              f"after engine import")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=150, help='timed frames per complexity')
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--complexity', type=int, nargs='+', default=[0, 1, 2], choices=(0, 1, 2))
+    parser.add_argument('--size', default='640x480', help='WIDTHxHEIGHT of the synthetic frames')
+    parser.add_argument('--no-startup', action='store_true', help='skip the startup runs')
+    parser.add_argument('--out', default='benchmark.json')
+    parser.add_argument('--compare', help='earlier results file to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=10.0,
+                        help='allowed p50 slowdown in percent with --compare')
+    args = parser.parse_args()
+
+    size = tuple(int(v) for v in args.size.split('x'))
+    results = run(args.complexity, args.frames, args.warmup, size, not args.no_startup)
+    print_results(results)
+    with open(args.out, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"wrote {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        regressions = compare(results, previous, args.tolerance)
+        print(f"{len(regressions)} stages slower than {args.tolerance:g}%")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""Picks poseDetector settings for this machine and writes the profile the entry points load.
+
+Usage:
+    python calibrate.py [--target-fps 20] [--complexity 0 1 2] [--scale 1.0 0.75 0.5]
+                        [--reps 3] [--out PROFILE.json]
+
+Every model complexity and input scale runs the synthetic push-up clip
+(synthetic.pushup_frames, swaying sideways) through its own detector and
+push-up counter. Three things are measured: the frame rate of
+process_frame, whether the count matches the clip's reps, and the mean
+error of the measured elbow angle against the angle the figure was drawn
+with. Settings that cannot be built, such as a model that fails to
+download, are reported and left out.
+
+Settings are ranked by accuracy: right count first, then angle error to
+the degree, then the larger model and input. The profile's `detector` is
+the most accurate one that holds `--target-fps`, or the fastest one when
+none does. Its `ladder` steps from there through faster settings, most
+accurate first, for the runtime step-down in engine/tuning.py. The
+profile goes to engine.tuning.PROFILE_PATH unless `--out` is given, and
+shared_detector() picks it up from then on.
+"""
+import argparse
+import json
+import platform
+import time
+
+import numpy as np
+
+import engine
+from engine import pushup
+from engine.tuning import PROFILE_PATH, save_profile
+import synthetic
+
+
+def measure(settings, reps=3, drift=40):
+    """Runs the synthetic clip through a detector with `settings` and returns its result."""
+    detector = engine.poseDetector(**settings)
+    result = dict(settings)
+    try:
+        detector.warmUp(background=False)
+    except Exception as e:
+        result['error'] = repr(e)
+        return result
+    counter = engine.create_counter('pushup')
+    frames = synthetic.clip_frames(reps)
+    truth = synthetic.rep_angles(frames, reps=reps)
+    elbow = pushup.PUSHUP_JOINTS.index((11, 13, 15))
+    seconds = 0.0
+    errors = []
+    for i, img in enumerate(synthetic.pushup_frames(reps, drift=drift)):
+        start = time.perf_counter()
+        img, angles = engine.process_frame(detector, counter, img, draw=False)
+        seconds += time.perf_counter() - start
+        if angles is not None:
+            errors.append(abs(angles[elbow] - truth[i]))
+    detector.close()
+    result.update(fps=round(frames / seconds, 1), count=counter.count,
+                  count_ok=counter.count == reps,
+                  found=round(len(errors) / frames, 3),
+                  angle_error=round(float(np.mean(errors)), 2) if errors else None)
+    return result
+
+
+def accuracy_rank(result):
+    # Angle errors within a degree are noise, the bigger model and input win those
+    error = result['angle_error']
+    return (not result['count_ok'], result['found'] < 0.95,
+            round(error) if error is not None else float('inf'),
+            -result['complexity'], -result['scale'])
+
+
+def choose(results, target_fps):
+    """Returns (chosen settings, ladder) from the measured results."""
+    usable = sorted((r for r in results if 'error' not in r), key=accuracy_rank)
+    if not usable:
+        return None, []
+    holding = [r for r in usable if r['fps'] >= target_fps]
+    chosen = holding[0] if holding else max(usable, key=lambda r: r['fps'])
+    ladder = [chosen]
+    for result in usable[usable.index(chosen) + 1:]:
+        if result['fps'] > ladder[-1]['fps']:
+            ladder.append(result)
+    settings = [{'complexity': r['complexity'], 'scale': r['scale']} for r in ladder]
+    return settings[0], settings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--target-fps', type=float, default=20.0)
+    parser.add_argument('--complexity', type=int, nargs='+', default=[0, 1, 2], choices=(0, 1, 2))
+    parser.add_argument('--scale', type=float, nargs='+', default=[1.0, 0.75, 0.5])
+    parser.add_argument('--reps', type=int, default=3, help='reps in the synthetic clip')
+    parser.add_argument('--out', default=PROFILE_PATH)
+    args = parser.parse_args()
+
+    results = []
+    for complexity in args.complexity:
+        for scale in args.scale:
+            result = measure({'complexity': complexity, 'scale': scale}, args.reps)
+            results.append(result)
+            print(json.dumps(result))
+    detector, ladder = choose(results, args.target_fps)
+    if detector is None:
+        print('no setting could be measured, profile not written')
+        raise SystemExit(1)
+    profile = {'target_fps': args.target_fps, 'detector': detector, 'ladder': ladder,
+               'results': results, 'created': time.time(),
+               'machine': {'platform': platform.platform(), 'processor': platform.processor(),
+                           'python': platform.python_version()}}
+    save_profile(profile, args.out)
+    print(f"detector {json.dumps(detector)}, ladder {json.dumps(ladder[1:])} -> {args.out}")
+
+
+if __name__ == '__main__':
+    main()
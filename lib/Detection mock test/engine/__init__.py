@@ -0,0 +1,45 @@
+"""Exercise engine: one pose detector and pluggable rep counters.
+
+    import cv2
+    import engine
+
+    detector = engine.shared_detector()
+    detector.warmUp()  # build the graph while the camera opens
+    counter = engine.create_counter('pullup')
+    engine.run(cv2.VideoCapture(0), detector, counter)
+
+Every counter implements RepCounter (update, count_clip, snapshot, draw)
+and names the joint triplets it needs, so process_frame is the single
+per-frame path for all exercises: one inference, one findAngles call, one
+state machine step. Import the package from `lib/Detection mock test`, or
+run `python -m engine pushup|situp|pullup` there.
+"""
+import time
+
+# Start of the process as far as the engine can tell, for startup timings
+STARTED = time.perf_counter()
+
+from .counter import RepCounter
+from .pose import calculate_angles, poseDetector, profiled_detector, shared_detector
+from .presence import PresenceGate
+from .profiling import StageProfiler, percentiles
+from .pullup import PullUpCounter
+from .pushup import PushUpCounter
+from .recording import Recorder, read as read_recording, replay
+from .render import Renderer, VideoEncoder
+from .runner import capture_source, process_frame, run
+from .scheduler import AdaptiveScheduler
+from .situp import SitUpCounter
+from .smoother import LandmarkSmoother
+from .tracking import MultiPersonTracker
+from .tuning import StepDownTuner, load_profile
+
+COUNTERS = {'pushup': PushUpCounter, 'situp': SitUpCounter, 'pullup': PullUpCounter}
+
+
+def create_counter(exercise, **kwargs):
+    """Returns a new counter for an exercise name like 'pushup' or 'Pull-Up'."""
+    name = exercise.lower().replace('-', '').replace('_', '')
+    if name not in COUNTERS:
+        raise ValueError(f"unknown exercise {exercise!r}, expected one of {sorted(COUNTERS)}")
+    return COUNTERS[name](**kwargs)
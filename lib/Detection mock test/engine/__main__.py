@@ -0,0 +1,98 @@
+"""Counts reps of an exercise from a camera or a video file.
+
+Usage:
+    python -m engine pushup|situp|pullup [--source 0|clip.mp4] [--target N]
+                                         [--complexity 1] [--profile] [--headless]
+                                         [--no-warmup] [--smooth N]
+                                         [--record SESSION.lmr]
+                                         [--render off|overlay|debug] [--video OUT.mp4]
+                                         [--gate | --skip N]
+
+The pose graph is built and warmed up on a background thread while the
+capture opens. The seconds from start to the first count are printed as
+a `startup` JSON line. With `--smooth N` the landmarks are averaged over
+N frames by the engine instead of by MediaPipe's own filter. `--record`
+keeps the session's landmarks, counts and feedback for replay with
+`python replay.py`. `--render` picks how much is drawn (engine/render.py)
+and `--video` writes the rendered frames on a background thread.
+`--gate` skips inference while nobody is in view (engine/presence.py).
+`--skip N` infers only on key frames, up to N frames apart, picked from
+how fast the joints move, and counts the frames in between on
+interpolated landmarks (engine/scheduler.py). Frames are then shown up to
+N frames late.
+Detector settings come from the calibration profile written by `python
+calibrate.py` when there is one (engine/tuning.py).
+"""
+import argparse
+import json
+
+import cv2
+
+from . import COUNTERS, capture_source, create_counter, run, shared_detector
+from .recording import Recorder
+from .presence import PresenceGate
+from .scheduler import AdaptiveScheduler
+from .render import MODES, VideoEncoder
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m engine',
+                                     description=__doc__.splitlines()[0])
+    parser.add_argument('exercise', choices=sorted(COUNTERS))
+    parser.add_argument('--source', default='0', help='camera index or video file')
+    parser.add_argument('--target', type=int, help='stop after this many reps')
+    parser.add_argument('--complexity', type=int, choices=(0, 1, 2),
+                        help="model complexity (default: the machine's profile, else 1)")
+    parser.add_argument('--profile', action='store_true', help='show per-stage timings')
+    parser.add_argument('--headless', action='store_true', help='count without a window')
+    parser.add_argument('--no-warmup', action='store_true',
+                        help='build the graph on the first frame instead of in the background')
+    parser.add_argument('--smooth', type=int, default=0, metavar='N',
+                        help='average the landmarks over N frames instead of MediaPipe smoothing')
+    parser.add_argument('--record', metavar='SESSION.lmr', help='record the landmarks to this file')
+    parser.add_argument('--render', choices=MODES,
+                        help='what to draw (default debug with a window, off headless)')
+    parser.add_argument('--video', metavar='OUT.mp4', help='write the rendered frames here')
+    skipping = parser.add_mutually_exclusive_group()
+    skipping.add_argument('--gate', action='store_true',
+                          help='only infer while someone may be in view')
+    skipping.add_argument('--skip', type=int, metavar='N',
+                          help='infer on key frames up to N frames apart, interpolating between')
+    args = parser.parse_args(argv)
+
+    kwargs = {} if args.complexity is None else {'complexity': args.complexity}
+    detector = shared_detector(smoothing=args.smooth, smooth_landmarks=not args.smooth,
+                               **kwargs)
+    if not args.no_warmup:
+        detector.warmUp()
+    if args.profile:
+        detector.enableProfiling()
+    cap = cv2.VideoCapture(capture_source(args.source))
+    recorder = None
+    if args.record:
+        recorder = Recorder(args.record, args.exercise, fps=cap.get(cv2.CAP_PROP_FPS),
+                            meta={'source': args.source, 'smoothing': args.smooth})
+    encoder = None
+    if args.video:
+        # A file can wait for the encoder, a camera cannot
+        encoder = VideoEncoder(args.video, cap.get(cv2.CAP_PROP_FPS) or 30.0,
+                               block=not args.source.isdigit())
+    gate = PresenceGate() if args.gate else None
+    counter = create_counter(args.exercise)
+    scheduler = None
+    if args.skip:
+        scheduler = AdaptiveScheduler.for_counter(detector, counter, args.skip)
+    count = run(cap, detector, counter, target=args.target,
+                show=not args.headless, recorder=recorder, render=args.render,
+                encoder=encoder, gate=gate, scheduler=scheduler)
+    if gate is not None:
+        print('gate', json.dumps(gate.stats))
+    if scheduler is not None:
+        print(f"inferred {scheduler.inferred} of {scheduler.index} frames")
+    if encoder is not None:
+        print(f"wrote {encoder.written} frames to {args.video} ({encoder.dropped} dropped)")
+    print(f"final {args.exercise} count: {count:g}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Interface shared by the rep counters."""
+from .quality import RepMetrics
+
+
+class RepCounter:
+    """A rep-counting state machine, like WorkoutLogic in lib/logic/workout_logic.dart.
+
+    A counter lists the (p1, p2, p3) joint triplets it needs in `joints`.
+    The engine computes those angles with one findAngles call per frame
+    and passes them to update(). count_clip runs the same state machine
+    over a whole (frames, len(joints)) angle array at once.
+
+    update() also feeds `metrics`, a RepMetrics that turns the angles of
+    each rep into a quality record in `metrics.records`.
+    """
+    name = ''
+    joints = ()
+    # A name for each joint angle, for the rep records
+    angle_names = ()
+    # Mirror the frame before inference
+    flip = False
+    # Draw MediaPipe's skeleton as well as the joint angles
+    draw_landmarks = False
+    window_name = 'Counter'
+    exit_key = 'q'
+
+    def __init__(self):
+        self.metrics = RepMetrics(self)
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.feedback = None
+        self.metrics.reset()
+
+    def update(self, angles):
+        """Advances the state machine with one frame's joint angles and returns the feedback."""
+        raise NotImplementedError
+
+    def count_clip(self, angles):
+        """Returns the count and the frame index of every rep for a (frames, len(joints)) array.
+
+        Starts from the state the counter was created with and matches
+        update() frame by frame.
+        """
+        raise NotImplementedError
+
+    def watched_angles(self):
+        """Returns, for each joint, the angles update() compares it against.
+
+        AdaptiveScheduler (engine/scheduler.py) infers on every frame near
+        one of them and skips frames far from all of them.
+        """
+        raise NotImplementedError
+
+    def rep_angle(self, angles):
+        """Returns the angle a rep flexes and extends, for range of motion and tempo."""
+        return angles[0]
+
+    def straightness(self, angles):
+        """Returns how straight the body is this frame, 0 to 1, or None when it does not apply."""
+        return None
+
+    def rep_quality(self, record, low):
+        """Returns a 0 to 1 score for a finished rep's record; `low` is its smallest rep angle."""
+        return record['straightness']
+
+    def snapshot(self):
+        """Returns what draw() needs as a dict, safe to hand to another thread."""
+        return {'count': self.count, 'feedback': self.feedback}
+
+    def draw(self, img, snapshot=None):
+        """Draws the count and feedback, from `snapshot` or the current state."""
+        raise NotImplementedError
+
+    def overlay_key(self, snapshot):
+        """Returns what draw_static depends on, or None when the overlay cannot be cached.
+
+        The render layer's overlay mode keeps one pre-rendered overlay per
+        key; with None it calls draw() every frame.
+        """
+        return None
+
+    def draw_static(self, img, snapshot):
+        """Draws the part of the overlay that only changes with overlay_key."""
+        self.draw(img, snapshot)
+
+    def draw_live(self, img, snapshot):
+        """Draws the part of the overlay that changes every frame, over draw_static."""
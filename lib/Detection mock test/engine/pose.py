@@ -0,0 +1,444 @@
+"""MediaPipe pose detector shared by every counter.
+
+Run `python -m engine.pose` to show the detected landmarks on the camera.
+
+Importing mediapipe takes over a second, so it is imported and the Pose
+graph built on first use rather than at import or construction.
+poseDetector.warmUp() does that, plus one inference, on a background
+thread while the camera or UI opens.
+"""
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from .profiling import StageProfiler
+from .smoother import LandmarkSmoother
+from .tuning import StepDownTuner, load_profile
+
+# Settings baked into the MediaPipe graph, changed only by rebuilding it
+GRAPH_SETTINGS = ('mode', 'complexity', 'smooth_landmarks', 'enable_segmentation',
+                  'smooth_segmentation', 'detectionCon', 'trackCon')
+
+# Landmark order of the mirrored body: left and right swap (eyes, ears,
+# mouth corners and 11-32 in pairs), the nose stays
+MIRROR = np.arange(33)
+for _left, _right in [(1, 4), (2, 5), (3, 6), (7, 8), (9, 10)] + [(i, i + 1) for i in range(11, 33, 2)]:
+    MIRROR[[_left, _right]] = _right, _left
+
+def _mediapipe():
+    """Imports mediapipe on first use."""
+    import mediapipe as mp
+    return mp
+
+def _buffer(buf, shape):
+    """Returns `buf` when it is a uint8 array of `shape`, else a new one."""
+    if buf is None or buf.shape != shape:
+        buf = np.empty(shape, np.uint8)
+    return buf
+
+def calculate_angles(points, joints):
+    """Returns the angle at p2 in degrees (0-180) for every (p1, p2, p3) triplet.
+
+    `points` is a (33, 2) array of landmark coordinates, giving one angle per
+    triplet, or a (frames, 33, 2) array, giving a (frames, len(joints))
+    time-series. All angles are computed in one vectorized pass.
+    """
+    points = np.asarray(points, np.float64)
+    joints = np.asarray(joints, np.intp).reshape(-1, 3)
+    a = points[..., joints[:, 0], :]
+    b = points[..., joints[:, 1], :]
+    c = points[..., joints[:, 2], :]
+    angles = np.degrees(np.arctan2(c[..., 1] - b[..., 1], c[..., 0] - b[..., 0]) -
+                        np.arctan2(a[..., 1] - b[..., 1], a[..., 0] - b[..., 0]))
+    angles = np.where(angles < 0, angles + 360, angles)
+    return np.where(angles > 180, 360 - angles, angles)
+
+def landmark_box(landmarks, shape, margin=0.0):
+    """Returns the pixel box (x0, y0, x1, y1) around the visible landmarks.
+
+    `landmarks` is a (33, 4) normalized array and `shape` the frame's
+    shape. The box is grown by `margin` times its size on each side and
+    clipped to the frame.
+    """
+    h, w = shape[:2]
+    visible = landmarks[landmarks[:, 3] > 0.5, :2]
+    if len(visible) == 0:
+        visible = landmarks[:, :2]
+    xmin, ymin = np.clip(visible.min(axis=0), 0, 1) * (w, h)
+    xmax, ymax = np.clip(visible.max(axis=0), 0, 1) * (w, h)
+    mx = (xmax - xmin) * margin
+    my = (ymax - ymin) * margin
+    return (max(int(xmin - mx), 0), max(int(ymin - my), 0),
+            min(int(xmax + mx) + 1, w), min(int(ymax + my) + 1, h))
+
+class poseDetector() :
+    
+    def __init__(self, mode=False, complexity=1, smooth_landmarks=True,
+                 enable_segmentation=False, smooth_segmentation=True,
+                 detectionCon=0.5, trackCon=0.5, scale=1.0, crop=False,
+                 crop_margin=0.3, smoothing=0, crop_fallback=True):
+        
+        self.mode = mode 
+        self.complexity = complexity
+        self.smooth_landmarks = smooth_landmarks
+        self.enable_segmentation = enable_segmentation
+        self.smooth_segmentation = smooth_segmentation
+        self.detectionCon = detectionCon
+        self.trackCon = trackCon
+        # Inference runs on the frame resized by `scale`, and with `crop` on
+        # the region around the last detected person (bounding box grown
+        # by `crop_margin` on each side). Landmarks are always returned
+        # relative to the full frame.
+        self.scale = scale
+        self.crop = crop
+        self.crop_margin = crop_margin
+        # Without `crop_fallback` a person lost from the crop is reported as
+        # no pose instead of searched for on the full frame, for callers
+        # like the multi-person tracker that own the crop
+        self.crop_fallback = crop_fallback
+        # Crop used for the next inference as (x0, y0, x1, y1), None for the full frame
+        self.roi = None
+        # With `smoothing` frames the landmarks are averaged like the app's
+        # PoseSmoother. That also steadies them with smooth_landmarks off,
+        # which saves MediaPipe's own filter.
+        self.smoother = LandmarkSmoother(smoothing) if smoothing else None
+        
+        # The MediaPipe graph, built by the `pose` property on first use
+        self._pose = None
+        self._poseLock = threading.Lock()
+        self._warmUpThread = None
+        # perf_counter() time when the graph had run its first inference
+        self.readyAt = None
+
+        # Landmarks of the last frame as (x, y, z, visibility), normalized
+        # to the frame, filled in place by findPose
+        self.landmarks = np.zeros((33, 4), np.float32)
+        # Pixel landmarks as [id, cx, cy] rows, filled in place by findPosition
+        self.lmArray = np.zeros((33, 3), np.int32)
+        self.lmArray[:, 0] = np.arange(33)
+        self._scaled = np.zeros((33, 2), np.float64)
+        self.lmList = self.lmArray[:0]
+        # StageProfiler timing every stage, None when profiling is off
+        self.profiler = None
+        # StepDownTuner fed every findPose's duration, None when off
+        self.tuner = None
+        # Reused destination buffers for the resized and RGB frames, and
+        # for reordering mirrored landmarks
+        self._small = None
+        self._rgb = None
+        self._mirrored = np.zeros((33, 4), np.float32)
+        self._stale = False
+        
+
+    @property
+    def mpDraw(self):
+        return _mediapipe().solutions.drawing_utils
+
+    @property
+    def mpPose(self):
+        return _mediapipe().solutions.pose
+
+    @property
+    def pose(self):
+        """The MediaPipe Pose graph, built once on first use."""
+        if self._pose is None:
+            with self._poseLock:
+                if self._pose is None:
+                    self._pose = self.mpPose.Pose(self.mode, self.complexity, self.smooth_landmarks,
+                                                  self.enable_segmentation, self.smooth_segmentation,
+                                                  self.detectionCon, self.trackCon)
+        return self._pose
+
+    def warmUp(self, background=True):
+        """Builds the graph and runs one inference on a blank frame.
+
+        With `background` this happens on a thread and the call returns at
+        once; the first findPose waits for it to finish. A no-op when the
+        graph is already warm or warming up.
+        """
+        if self.readyAt is not None or self._warmUpThread is not None:
+            return
+        def work():
+            self.pose.process(np.zeros((480, 640, 3), np.uint8))
+            self.readyAt = time.perf_counter()
+        if not background:
+            work()
+            return
+        self._warmUpThread = threading.Thread(target=work, daemon=True)
+        self._warmUpThread.start()
+
+    def reconfigure(self, **settings):
+        """Changes constructor settings between frames.
+
+        `scale` and the crop settings apply from the next frame. Graph
+        settings (GRAPH_SETTINGS) rebuild the graph on a background
+        thread, and the next findPose waits for it.
+        """
+        rebuild = False
+        for name, value in settings.items():
+            if not hasattr(self, name):
+                raise TypeError(f"unknown detector setting {name!r}")
+            rebuild |= name in GRAPH_SETTINGS and getattr(self, name) != value
+            setattr(self, name, value)
+        if rebuild:
+            self.close()
+            self.warmUp()
+
+    def close(self):
+        """Releases the MediaPipe graph; the next use builds a new one."""
+        if self._warmUpThread is not None:
+            self._warmUpThread.join()
+            self._warmUpThread = None
+        with self._poseLock:
+            pose, self._pose = self._pose, None
+        self.readyAt = None
+        if pose is not None:
+            pose.close()
+
+    def enableProfiling(self, window=300):
+        """Starts timing every stage into a StageProfiler and returns it."""
+        self.profiler = StageProfiler(window)
+        return self.profiler
+        
+    def findPose (self, img, draw=True, mirror=False):
+        """Finds the pose in a BGR frame into self.landmarks and self.results.
+
+        With `mirror` the landmarks are those of the frame flipped
+        horizontally (x mirrored, left and right swapped), so the caller
+        can flip only the frame it shows instead of the one it infers on.
+        results keeps the pose as found in the frame as given, so the
+        skeleton is drawn before the caller flips it.
+        """
+        prof = self.profiler
+        if self.tuner: began = time.perf_counter()
+        roi = self.roi
+        self.results = self._process(img, roi)
+        if roi is not None and not self.results.pose_landmarks and self.crop_fallback:
+            # Tracking lost, fall back to the full frame
+            roi = self.roi = None
+            self.results = self._process(img, roi)
+        
+        if self.results.pose_landmarks:
+            if prof: start = prof.clock()
+            self.landmarks[:] = [(lm.x, lm.y, lm.z, lm.visibility)
+                                 for lm in self.results.pose_landmarks.landmark]
+            if roi is not None:
+                self._mapToFrame(img, roi)
+            # The crop is picked in the coordinates of the frame as given
+            if self.crop:
+                self._updateRoi(img)
+            if mirror:
+                self.landmarks[:, 0] = 1 - self.landmarks[:, 0]
+                np.take(self.landmarks, MIRROR, axis=0, out=self._mirrored)
+                self.landmarks[:] = self._mirrored
+            if prof: start = prof.lap('landmarks', start)
+            if self.smoother is not None:
+                self.smoother.update(self.landmarks)
+                if prof: start = prof.lap('smooth', start)
+            # results catches up with smoothed landmarks when drawn
+            self._stale = self.smoother is not None and not mirror
+            if draw:
+                self.drawPose(img)
+
+        if self.tuner: self.tuner.observe(time.perf_counter() - began)
+        return img
+
+    def poseLandmarks(self):
+        """Returns results.pose_landmarks brought in step with the smoothed landmarks, for drawing."""
+        if self._stale:
+            self._syncResults()
+        return self.results.pose_landmarks
+
+    def drawPose(self, img):
+        """Draws MediaPipe's skeleton for the current landmarks."""
+        prof = self.profiler
+        if prof: start = prof.clock()
+        self.mpDraw.draw_landmarks(img, self.poseLandmarks(),
+                                   self.mpPose.POSE_CONNECTIONS)
+        if prof: prof.lap('draw_landmarks', start)
+    
+    def _process(self, img, roi):
+        prof = self.profiler
+        if roi is not None:
+            x0, y0, x1, y1 = roi
+            img = img[y0:y1, x0:x1]
+        if prof: start = prof.clock()
+        if self.scale != 1:
+            h, w = img.shape[:2]
+            size = (round(w * self.scale), round(h * self.scale))
+            self._small = _buffer(self._small, (size[1], size[0], 3))
+            img = cv2.resize(img, size, dst=self._small, interpolation=cv2.INTER_AREA)
+            if prof: start = prof.lap('resize', start)
+        self._rgb = _buffer(self._rgb, img.shape)
+        imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=self._rgb)
+        if prof: start = prof.lap('cvtColor', start)
+        if self._warmUpThread is not None:
+            self._warmUpThread.join()
+            self._warmUpThread = None
+        # MediaPipe takes a read-only frame by reference instead of copying it
+        imgRGB.flags.writeable = False
+        try:
+            results = self.pose.process(imgRGB)
+        finally:
+            imgRGB.flags.writeable = True
+        if self.readyAt is None:
+            self.readyAt = time.perf_counter()
+        if prof: prof.lap('process', start)
+        return results
+
+    def _mapToFrame(self, img, roi):
+        """Maps landmarks found in the crop back to full-frame coordinates."""
+        h, w = img.shape[:2]
+        x0, y0, x1, y1 = roi
+        self.landmarks[:, 0] = (self.landmarks[:, 0] * (x1 - x0) + x0) / w
+        self.landmarks[:, 1] = (self.landmarks[:, 1] * (y1 - y0) + y0) / h
+        # MediaPipe scales z like x
+        self.landmarks[:, 2] *= (x1 - x0) / w
+        self._syncResults()
+
+    def _syncResults(self):
+        """Copies the landmarks back into results, keeping them consistent for drawing and other readers."""
+        for lm, (x, y, z, v) in zip(self.results.pose_landmarks.landmark,
+                                    self.landmarks.tolist()):
+            lm.x, lm.y, lm.z, lm.visibility = x, y, z, v
+        self._stale = False
+
+    def _updateRoi(self, img):
+        """Picks the crop for the next frame from the current landmarks."""
+        h, w = img.shape[:2]
+        if self.roi is not None:
+            # Keep the crop steady while the person stays well inside it, so
+            # MediaPipe's own tracking sees a stable image
+            inner = landmark_box(self.landmarks, img.shape, self.crop_margin / 2)
+            x0, y0, x1, y1 = self.roi
+            if inner[0] > x0 and inner[1] > y0 and inner[2] < x1 and inner[3] < y1:
+                return
+        x0, y0, x1, y1 = landmark_box(self.landmarks, img.shape, self.crop_margin)
+        # Not worth cropping when the person fills most of the frame
+        if (x1 - x0) * (y1 - y0) > 0.8 * w * h:
+            self.roi = None
+        else:
+            self.roi = (x0, y0, x1, y1)
+
+    def findPosition(self, img, draw=True):
+        """Returns the pixel landmarks as a (33, 3) array of [id, cx, cy] rows.
+
+        The array is a view on a buffer reused every frame and is empty when
+        no pose was found, so `len(lmList)` and `lmList[id][1:]` work as they
+        did with the old list of lists.
+        """
+        if not self.results.pose_landmarks:
+            self.lmList = self.lmArray[:0]
+            return self.lmList
+        prof = self.profiler
+        if prof: start = prof.clock()
+        #finding height, width of the image printed
+        h, w = img.shape[:2]
+        #Determining the pixels of all landmarks at once
+        np.multiply(self.landmarks[:, :2], (w, h), out=self._scaled)
+        np.copyto(self.lmArray[:, 1:], self._scaled, casting='unsafe')
+        self.lmList = self.lmArray
+        if draw:
+            for id, cx, cy in self.lmArray.tolist():
+                cv2.circle(img, (cx, cy), 5, (255,0,0), cv2.FILLED)
+        if prof: prof.lap('findPosition', start)
+        return self.lmList
+        
+    def findAngle(self, img, p1, p2, p3, draw=True):   
+        #Calculate Angle
+        angle = float(self.findAngles([(p1, p2, p3)])[0])
+        
+        #Draw
+        if draw:
+            self.drawAngle(img, p1, p2, p3, angle)
+        return angle
+
+    def findAngles(self, joints, points=None):
+        """Returns the angles for an array of (p1, p2, p3) triplets in one call.
+
+        Uses the pixel landmarks of the last findPosition call unless a
+        (33, 2) or (frames, 33, 2) `points` array is given.
+        """
+        prof = self.profiler
+        if prof: start = prof.clock()
+        if points is None:
+            points = self.lmArray[:, 1:]
+        angles = calculate_angles(points, joints)
+        if prof: prof.lap('findAngle', start)
+        return angles
+
+    def drawAngle(self, img, p1, p2, p3, angle):
+        prof = self.profiler
+        if prof: start = prof.clock()
+        (x1, y1), (x2, y2), (x3, y3) = self.lmArray[[p1, p2, p3], 1:].tolist()
+        cv2.line(img, (x1, y1), (x2, y2), (255,255,255), 3)
+        cv2.line(img, (x3, y3), (x2, y2), (255,255,255), 3)
+
+        
+        cv2.circle(img, (x1, y1), 5, (0,0,255), cv2.FILLED)
+        cv2.circle(img, (x1, y1), 15, (0,0,255), 2)
+        cv2.circle(img, (x2, y2), 5, (0,0,255), cv2.FILLED)
+        cv2.circle(img, (x2, y2), 15, (0,0,255), 2)
+        cv2.circle(img, (x3, y3), 5, (0,0,255), cv2.FILLED)
+        cv2.circle(img, (x3, y3), 15, (0,0,255), 2)
+        
+        cv2.putText(img, str(int(angle)), (x2-50, y2+50), 
+                    cv2.FONT_HERSHEY_PLAIN, 2, (0,0,255), 2)
+        if prof: prof.lap('drawAngle', start)
+        
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+def profiled_detector(**kwargs):
+    """Returns a new detector with the settings of this machine's calibration profile.
+
+    Settings not given come from the profile when there is one
+    (engine/tuning.py). Unless the complexity or scale is given, the
+    detector then has its own StepDownTuner, and steps down the
+    profile's ladder when it cannot keep up the profile's frame rate.
+    For entry points that need a graph per capture, like stream_server.py.
+    """
+    profile = load_profile()
+    if profile is None:
+        return poseDetector(**kwargs)
+    detector = poseDetector(**dict(profile['detector'], **kwargs))
+    if profile.get('ladder') and not {'complexity', 'scale'} & set(kwargs):
+        detector.tuner = StepDownTuner(detector, profile['ladder'], profile['target_fps'])
+    return detector
+
+
+def shared_detector(**kwargs):
+    """Returns the process-wide detector for these settings, creating it on first call.
+
+    Entry points that count several captures (a.py's camera and file
+    buttons) reuse one graph instead of building one per capture. The
+    detector is built by profiled_detector(), so it starts from this
+    machine's calibration profile.
+    """
+    key = tuple(sorted(kwargs.items()))
+    with _shared_lock:
+        if key not in _shared:
+            _shared[key] = profiled_detector(**kwargs)
+        return _shared[key]
+
+
+def main():
+    detector = poseDetector()
+    detector.warmUp()
+    cap = cv2.VideoCapture(0)
+    while cap.isOpened():
+        ret, img = cap.read() #ret is just the return variable, not much in there that we will use. 
+        if ret:    
+            img = detector.findPose(img)
+            cv2.imshow('Pose Detection', img)
+        if cv2.waitKey(10) & 0xFF == ord('q'):
+            break
+            
+    cap.release()
+    cv2.destroyAllWindows()
+    
+if __name__ == "__main__":
+    main()
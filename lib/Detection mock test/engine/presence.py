@@ -0,0 +1,99 @@
+"""Presence gating: skip pose inference while nobody is in view.
+
+PresenceGate shrinks every frame it checks to a tiny grayscale thumbnail
+and compares it with the thumbnail of the previous check. The thumbnail
+samples the frame (bilinear, not area averaging, which costs 30 times
+more) and a change only counts past `threshold` gray levels, so sensor
+noise does not register. A check costs a few tens of microseconds against
+tens of milliseconds for MediaPipe Pose.
+
+The gate starts `active`, where every frame is inferred. After
+`idle_after` frames in a row with no pose found and no motion, it goes
+`idle`. Then only one frame in `idle_every` is decoded and checked, and
+the rest are grabbed without decoding (engine.run does that with
+cap.grab()). Every `probe_every` checks it still runs one inference, for
+someone who came in between checks and stands still. When a check sees
+motion, that same frame is inferred and the gate is active again, so
+someone stepping in is picked up within `idle_every` frames.
+"""
+import cv2
+
+
+class PresenceGate:
+    """Decides per frame whether pose inference is worth running.
+
+    Motion is the fraction of thumbnail pixels that changed by more than
+    `threshold` gray levels since the last check, and the scene is
+    moving when that fraction is above `motion`.
+    """
+
+    def __init__(self, size=(64, 48), threshold=25, motion=0.01, idle_after=30,
+                 idle_every=2, probe_every=15):
+        self.size = size
+        self.threshold = threshold
+        self.motion = motion
+        self.idle_after = idle_after
+        self.idle_every = idle_every
+        self.probe_every = probe_every
+        self.state = 'active'
+        self._small = None
+        self._gray = None
+        self._previous = None
+        self._diff = None
+        self._quiet = 0
+        self._skipped = 0
+        self._checks = 0
+        self.moving = False
+        # Frames by what happened to them, and how often idle ended
+        self.stats = {'inferred': 0, 'checked': 0, 'grabbed': 0, 'resumes': 0}
+
+    def skip(self):
+        """Returns True when the next frame can be grabbed without decoding it."""
+        if self.state != 'idle' or self._skipped >= self.idle_every - 1:
+            self._skipped = 0
+            return False
+        self._skipped += 1
+        self.stats['grabbed'] += 1
+        return True
+
+    def check(self, img):
+        """Looks at a decoded frame and returns True when it should be inferred."""
+        self.moving = self._moving(img)
+        if self.state == 'active':
+            self.stats['inferred'] += 1
+            return True
+        self._checks += 1
+        if self.moving:
+            self.state = 'active'
+            self._quiet = 0
+            self.stats['resumes'] += 1
+            self.stats['inferred'] += 1
+            return True
+        if self._checks % self.probe_every == 0:
+            self.stats['inferred'] += 1
+            return True
+        self.stats['checked'] += 1
+        return False
+
+    def observe(self, found):
+        """Tells the gate whether the inference of the checked frame found a pose."""
+        if found:
+            self.state = 'active'
+            self._quiet = 0
+            return
+        self._quiet = 0 if self.moving else self._quiet + 1
+        if self.state == 'active' and self._quiet >= self.idle_after:
+            self.state = 'idle'
+            self._checks = 0
+
+    def _moving(self, img):
+        self._small = cv2.resize(img, self.size, dst=self._small, interpolation=cv2.INTER_LINEAR)
+        self._gray = cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        if self._previous is None:
+            self._previous = self._gray.copy()
+            return True
+        self._diff = cv2.absdiff(self._gray, self._previous, dst=self._diff)
+        self._previous, self._gray = self._gray, self._previous
+        changed = cv2.countNonZero(cv2.threshold(self._diff, self.threshold, 255,
+                                                 cv2.THRESH_BINARY)[1])
+        return changed > self.motion * self.size[0] * self.size[1]
@@ -0,0 +1,121 @@
+"""Per-stage timings and latency percentiles.
+
+StageProfiler is what `poseDetector.enableProfiling()` attaches; the
+counting loops time their stages into it. percentiles() summarizes the
+latency samples the pipelines and tools keep themselves.
+"""
+import bisect
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+
+def percentiles(samples, points=(50, 95), digits=1):
+    """Returns {'p50': ..., 'p95': ...} in milliseconds for samples in seconds, None when empty."""
+    if not len(samples):
+        return {f"p{p}": None for p in points}
+    values = np.percentile(np.asarray(samples, np.float64) * 1000, points)
+    return {f"p{p}": round(float(v), digits) for p, v in zip(points, values)}
+
+
+class _StageTimes:
+    __slots__ = ('ring', 'count', 'total', 'buckets')
+
+    def __init__(self, window, buckets):
+        self.ring = [0.0] * window
+        self.count = 0
+        self.total = 0.0
+        self.buckets = [0] * buckets
+
+class StageProfiler:
+    """Rolling per-stage timings for poseDetector and the counter loops.
+
+    Each stage keeps its last `window` durations for percentiles, and
+    cumulative histogram buckets since start for the Prometheus dump.
+    Callers time a stage with `start = prof.clock()` ... `prof.lap(stage,
+    start)` behind an `if prof:` test, so with profiling off (the default,
+    `detector.profiler` is None) a stage costs one truth test.
+    """
+    # Upper bounds of the Prometheus histogram buckets, in seconds
+    BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5)
+    clock = staticmethod(time.perf_counter)
+
+    def __init__(self, window=300):
+        self.window = window
+        self.stages = {}
+        self.last_log = time.perf_counter()
+
+    def add(self, stage, seconds):
+        times = self.stages.get(stage)
+        if times is None:
+            times = self.stages[stage] = _StageTimes(self.window, len(self.BUCKETS) + 1)
+        times.ring[times.count % self.window] = seconds
+        times.count += 1
+        times.total += seconds
+        times.buckets[bisect.bisect_left(self.BUCKETS, seconds)] += 1
+
+    def lap(self, stage, start):
+        """Records the time since `start` for `stage` and returns the current time."""
+        now = time.perf_counter()
+        self.add(stage, now - start)
+        return now
+
+    def stats(self):
+        """Returns {stage: p50/p95/p99/mean in ms over the window, calls since start}."""
+        stats = {}
+        for stage, times in list(self.stages.items()):
+            ms = np.array(times.ring[:min(times.count, self.window)]) * 1000
+            p50, p95, p99 = np.percentile(ms, (50, 95, 99))
+            stats[stage] = {'p50': round(float(p50), 3), 'p95': round(float(p95), 3),
+                            'p99': round(float(p99), 3), 'mean': round(float(ms.mean()), 3),
+                            'calls': times.count}
+        return stats
+
+    def log_line(self):
+        """Returns the current stats as one JSON line."""
+        return json.dumps({'time': round(time.time(), 3), 'stages': self.stats()})
+
+    def periodic_log(self, every=5.0):
+        """Returns log_line() once every `every` seconds and None in between."""
+        now = time.perf_counter()
+        if now - self.last_log < every:
+            return None
+        self.last_log = now
+        return self.log_line()
+
+    def prometheus(self, name='moveit_stage_seconds'):
+        """Returns every stage as a Prometheus text-format histogram."""
+        lines = [f'# HELP {name} Time spent in each frame processing stage.',
+                 f'# TYPE {name} histogram']
+        for stage, times in list(self.stages.items()):
+            total = 0
+            for bound, n in zip(self.BUCKETS + ('+Inf',), times.buckets):
+                total += n
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {total}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {times.total:.6f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {times.count}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        """Writes the Prometheus dump to `path` atomically, for a textfile collector."""
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            f.write(self.prometheus())
+        os.replace(tmp, path)
+
+    def draw(self, img, origin=(10, 130)):
+        """Draws a p50/p95 table of the stages on the image."""
+        x, y = origin
+        rows = [('stage', 'p50 ms', 'p95 ms')]
+        rows += [(stage, f"{s['p50']:.2f}", f"{s['p95']:.2f}")
+                 for stage, s in self.stats().items()]
+        cv2.rectangle(img, (x - 5, y - 15), (x + 250, y + 18 * len(rows) - 10),
+                      (0, 0, 0), cv2.FILLED)
+        for row in rows:
+            for column, text in zip((0, 130, 190), row):
+                cv2.putText(img, text, (x + column, y), cv2.FONT_HERSHEY_PLAIN, 1,
+                            (255, 255, 255), 1)
+            y += 18
@@ -0,0 +1,117 @@
+"""Pull-up counting, mirroring PullUpLogic in lib/logic/workout_logic.dart."""
+import cv2
+import numpy as np
+
+from .counter import RepCounter
+
+# Left and right shoulder - elbow - wrist
+PULLUP_JOINTS = ((11, 13, 15), (12, 14, 16))
+# Average elbow angle above which the arms count as straight (hanging)
+DOWN_ANGLE = 150
+# Average elbow angle below which the chin is taken to be over the bar
+UP_ANGLE = 70
+
+
+def update_state_and_count(angle, state, count, down_angle=DOWN_ANGLE, up_angle=UP_ANGLE):
+    """Updates the state (0 hanging, 1 pulled up), count and feedback from the average elbow angle."""
+    if angle > down_angle:
+        feedback = "Pull Up!" if state == 1 else "Ready"
+        state = 0
+    elif angle < up_angle:
+        feedback = None
+        if state == 0:
+            count += 1
+            state = 1
+            feedback = "Good! Lower"
+    else:
+        feedback = "Higher..." if state == 0 else "Lower..."
+    return feedback, state, count
+
+
+def rep_quality(angle):
+    """How high the pull was, 0 to 1, like PullUpLogic.repQuality (None above 90 degrees)."""
+    if angle >= 90:
+        return None
+    return min((90 - angle) / 40.0, 1.0)
+
+
+def count_clip(angles, state=0, down_angle=DOWN_ANGLE, up_angle=UP_ANGLE):
+    """Counts a whole clip at once, matching update_state_and_count frame by frame.
+
+    Takes the per-frame average elbow angles (frames with a pose only) and
+    returns the count and the frame index of every rep.
+    """
+    angles = np.asarray(angles, np.float64)
+    # Hanging frames set state 0, pulled-up frames state 1, the rest keep it
+    events = np.flatnonzero((angles > down_angle) | (angles < up_angle))
+    states = (angles[events] < up_angle).astype(np.int8)
+    prev = np.concatenate(([state], states[:-1]))
+    reps = events[(prev == 0) & (states == 1)]
+    return len(reps), reps
+
+
+def draw_ui(img, count, feedback):
+    """Draws the count and feedback on the image."""
+    cv2.rectangle(img, (0, 0), (260, 90), (0, 0, 0), cv2.FILLED)
+    cv2.putText(img, f'Pull-ups: {count}', (10, 40),
+                cv2.FONT_HERSHEY_COMPLEX, 1, (255, 200, 30), 2)
+    if feedback:
+        cv2.putText(img, feedback, (10, 75),
+                    cv2.FONT_HERSHEY_COMPLEX, 0.8, (255, 255, 255), 2)
+
+
+class PullUpCounter(RepCounter):
+    """Counts a rep when both arms bend past UP_ANGLE after hanging straight."""
+    name = 'pullup'
+    joints = PULLUP_JOINTS
+    angle_names = ('left_elbow', 'right_elbow')
+    window_name = 'Pullup Counter'
+    exit_key = 'q'
+
+    def __init__(self, down_angle=DOWN_ANGLE, up_angle=UP_ANGLE):
+        self.down_angle = down_angle
+        self.up_angle = up_angle
+        super().__init__()
+
+    def reset(self):
+        self.count, self.state = 0, 0
+        self.feedback = "Hang from bar..."
+        self.quality = 0.0
+        self.metrics.reset()
+
+    def update(self, angles):
+        angle = (angles[0] + angles[1]) / 2
+        quality = rep_quality(angle)
+        if quality is not None:
+            self.quality = quality
+        feedback, self.state, self.count = update_state_and_count(
+            angle, self.state, self.count, self.down_angle, self.up_angle)
+        # Like PullUpLogic, the message is kept while holding the top
+        if feedback is not None:
+            self.feedback = feedback
+        self.metrics.update(angles, self.count)
+        return self.feedback
+
+    def count_clip(self, angles):
+        angles = np.asarray(angles, np.float64)
+        return count_clip(angles.mean(axis=1), 0, self.down_angle, self.up_angle)
+
+    def watched_angles(self):
+        # The mean of the elbows is counted, each elbow is watched
+        return (self.down_angle, self.up_angle), (self.down_angle, self.up_angle)
+
+    def rep_angle(self, angles):
+        return (angles[0] + angles[1]) / 2
+
+    def rep_quality(self, record, low):
+        return rep_quality(low) or 0.0
+
+    def snapshot(self):
+        return {'count': self.count, 'feedback': self.feedback, 'quality': self.quality}
+
+    def draw(self, img, snapshot=None):
+        snapshot = snapshot or self.snapshot()
+        draw_ui(img, snapshot['count'], snapshot['feedback'])
+
+    def overlay_key(self, snapshot):
+        return snapshot['count'], snapshot['feedback']
@@ -0,0 +1,148 @@
+"""Push-up counting: elbow depth with shoulder and hip form checks."""
+import cv2
+import numpy as np
+
+from .counter import RepCounter
+
+# Elbow, shoulder and hip joints, in the order update_feedback_and_count takes them
+PUSHUP_JOINTS = ((11, 13, 15), (13, 11, 23), (11, 23, 25))
+# Elbow bent / extended angles and the minimum shoulder and hip angles for good form
+THRESHOLDS = {'elbow_down': 90, 'elbow_up': 160, 'shoulder': 40, 'hip': 160}
+
+
+def update_feedback_and_count(elbow, shoulder, hip, direction, count, form, thresholds=THRESHOLDS):
+    """Determines the feedback message and updates the count based on the angles."""
+    elbow_down, elbow_up = thresholds['elbow_down'], thresholds['elbow_up']
+    shoulder_min, hip_min = thresholds['shoulder'], thresholds['hip']
+    feedback = "Fix Form"
+    if elbow > elbow_up and shoulder > shoulder_min and hip > hip_min:
+        form = 1
+    if form == 1:
+        if elbow <= elbow_down and hip > hip_min:
+            feedback = "Up"
+            if direction == 0:
+                count += 0.5
+                direction = 1
+        elif elbow > elbow_up and shoulder > shoulder_min and hip > hip_min:
+            feedback = "Down"
+            if direction == 1:
+                count += 0.5
+                direction = 0
+        else:
+            feedback = "Fix Form"
+    return feedback, count, direction, form
+
+
+def count_clip(elbow, shoulder, hip, thresholds=THRESHOLDS):
+    """Counts a whole clip at once, matching update_feedback_and_count frame by frame.
+
+    Takes per-frame angle arrays (frames with a pose only) and returns the
+    count and the frame indices at which each full rep completed.
+    """
+    elbow, shoulder, hip = (np.asarray(a, np.float64) for a in (elbow, shoulder, hip))
+    top = (elbow > thresholds['elbow_up']) & (shoulder > thresholds['shoulder']) & (hip > thresholds['hip'])
+    bottom = (elbow <= thresholds['elbow_down']) & (hip > thresholds['hip'])
+    # Form latches on the first top frame, nothing counts before it
+    form = np.logical_or.accumulate(top)
+    # Frames in the middle band keep the direction (hysteresis), so only
+    # bottom (direction 1) and top (direction 0) frames matter
+    events = np.flatnonzero(form & (bottom | top))
+    direction = bottom[events].astype(np.int8)
+    # Every change of direction, starting from 0, is half a rep
+    half_reps = events[np.flatnonzero(np.diff(direction, prepend=0))]
+    return 0.5 * len(half_reps), half_reps[1::2]
+
+
+def draw_ui(img, per, bar, count, feedback, form):
+    """Draws the UI elements on the image."""
+    draw_static_ui(img, count, feedback, form)
+    draw_bar(img, per, bar, form)
+
+
+def draw_static_ui(img, count, feedback, form):
+    """Draws the bar outline, the count and the feedback."""
+    if form == 1:
+        cv2.rectangle(img, (580, 50), (600, 380), (0, 255, 0), 3)
+
+    cv2.rectangle(img, (0, 380), (100, 480), (0, 255, 0), cv2.FILLED)
+    cv2.putText(img, str(int(count)), (25, 455), cv2.FONT_HERSHEY_PLAIN, 5, (255, 0, 0), 5)
+
+    cv2.rectangle(img, (500, 0), (640, 40), (255, 255, 255), cv2.FILLED)
+    cv2.putText(img, feedback, (500, 40), cv2.FONT_HERSHEY_PLAIN, 2, (0, 255, 0), 2)
+
+
+def draw_bar(img, per, bar, form):
+    """Draws the elbow depth bar and percentage once form is locked in."""
+    if form == 1:
+        cv2.rectangle(img, (580, int(bar)), (600, 380), (0, 255, 0), cv2.FILLED)
+        cv2.putText(img, f'{int(per)}%', (565, 430), cv2.FONT_HERSHEY_PLAIN, 2, (255, 0, 0), 2)
+
+
+class PushUpCounter(RepCounter):
+    """Counts half a rep at the bottom and half at the top, once form is locked in."""
+    name = 'pushup'
+    joints = PUSHUP_JOINTS
+    angle_names = ('elbow', 'shoulder', 'hip')
+    window_name = 'Pushup Counter'
+    exit_key = 'q'
+
+    def __init__(self, thresholds=THRESHOLDS):
+        self.thresholds = thresholds
+        super().__init__()
+
+    def reset(self):
+        self.count, self.direction, self.form = 0, 0, 0
+        self.feedback = "Fix Form"
+        self.elbow = None
+        self.metrics.reset()
+
+    def update(self, angles):
+        elbow, shoulder, hip = angles
+        self.elbow = elbow
+        self.feedback, self.count, self.direction, self.form = update_feedback_and_count(
+            elbow, shoulder, hip, self.direction, self.count, self.form, self.thresholds)
+        self.metrics.update(angles, self.count)
+        return self.feedback
+
+    def count_clip(self, angles):
+        return count_clip(*np.asarray(angles, np.float64).T, thresholds=self.thresholds)
+
+    def watched_angles(self):
+        t = self.thresholds
+        return (t['elbow_down'], t['elbow_up']), (t['shoulder'],), (t['hip'],)
+
+    def straightness(self, angles):
+        # Like PushUpLogic's bodyStraightness
+        return angles[2] / 180.0
+
+    def rep_quality(self, record, low):
+        # Like PushUpLogic.repQuality, halved when the hips broke form during the rep
+        if record['min']['hip'] < self.thresholds['hip']:
+            return record['straightness'] * 0.5
+        return record['straightness']
+
+    def snapshot(self):
+        return {'count': self.count, 'feedback': self.feedback,
+                'form': self.form, 'elbow': self.elbow}
+
+    def draw(self, img, snapshot=None):
+        snapshot = snapshot or self.snapshot()
+        if snapshot['elbow'] is None:
+            return
+        self.draw_static(img, snapshot)
+        self.draw_live(img, snapshot)
+
+    def overlay_key(self, snapshot):
+        # Nothing is drawn before the first pose
+        if snapshot['elbow'] is None:
+            return None
+        return snapshot['count'], snapshot['feedback'], snapshot['form']
+
+    def draw_static(self, img, snapshot):
+        draw_static_ui(img, snapshot['count'], snapshot['feedback'], snapshot['form'])
+
+    def draw_live(self, img, snapshot):
+        down, up = self.thresholds['elbow_down'], self.thresholds['elbow_up']
+        per = np.interp(snapshot['elbow'], (down, up), (0, 100))
+        bar = np.interp(snapshot['elbow'], (down, up), (380, 50))
+        draw_bar(img, per, bar, snapshot['form'])
@@ -0,0 +1,122 @@
+"""Per-rep quality metrics, accumulated frame by frame alongside the count.
+
+Every counter has a RepMetrics fed the same joint angles as its state
+machine. Between two reps it keeps only running values:
+- the lowest and highest value of every angle;
+- frames spent flexing (the rep angle closing) and extending (opening),
+  a pause counting toward the phase it ends;
+- the sum of the counter's per-frame straightness score, if it has one.
+
+No frame history is kept, so an update costs the same few comparisons
+whatever the rep's length. When the count reaches a new whole rep, the
+values become a record and start over:
+
+    {"rep": 3, "end": 412, "frames": 61, "flex_frames": 29, "extend_frames": 32,
+     "rom": 121.4, "min": {"elbow": 56.2, ...}, "max": {"elbow": 177.6, ...},
+     "straightness": 0.97, "quality": 0.97}
+
+Tempo is in frames (`end` is the frame the rep completed on), so records
+are the same in a live run and in a replay of its recording. Turning
+points between flexing and extending need the rep angle to move back by
+`band` degrees, so landmark jitter does not split a phase.
+"""
+import math
+
+
+class RepMetrics:
+    """Running per-rep metrics of a counter; `records` holds one dict per completed rep."""
+
+    def __init__(self, counter, band=3.0):
+        self.counter = counter
+        self.band = band
+        self.records = []
+        self.reset()
+
+    def reset(self):
+        self.records = []
+        self.rep = 0
+        self.frame = 0
+        self._direction = None
+        self._turn = None
+        self._start()
+
+    def _start(self):
+        n = len(self.counter.joints)
+        self.start = self.frame
+        self.low = [math.inf] * n
+        self.high = [-math.inf] * n
+        self.rep_low = math.inf
+        self.rep_high = -math.inf
+        self.flex = 0
+        self.extend = 0
+        self.straight_sum = 0.0
+        self.straight_frames = 0
+
+    def update(self, angles, count):
+        """Adds one frame's angles and returns the rep's record when `count` completed a rep."""
+        low, high = self.low, self.high
+        for i, angle in enumerate(angles):
+            if angle < low[i]:
+                low[i] = angle
+            if angle > high[i]:
+                high[i] = angle
+        counter = self.counter
+        angle = counter.rep_angle(angles)
+        if angle < self.rep_low:
+            self.rep_low = angle
+        if angle > self.rep_high:
+            self.rep_high = angle
+        self._track(angle)
+        straightness = counter.straightness(angles)
+        if straightness is not None:
+            self.straight_sum += straightness
+            self.straight_frames += 1
+        self.frame += 1
+        # Push-ups count halves, a rep is done on a whole number
+        if int(count) <= self.rep:
+            return None
+        self.rep = int(count)
+        record = self._record()
+        self.records.append(record)
+        self._start()
+        return record
+
+    def _track(self, angle):
+        """Counts the frame as flexing or extending, turning after `band` degrees back."""
+        direction, turn = self._direction, self._turn
+        if turn is None:
+            self._turn = angle
+            return
+        if direction is None:
+            if abs(angle - turn) > self.band:
+                self._direction = 'flex' if angle < turn else 'extend'
+                self._turn = angle
+            return
+        if direction == 'flex':
+            if angle < turn:
+                self._turn = angle
+            elif angle > turn + self.band:
+                self._direction, self._turn = 'extend', angle
+        else:
+            if angle > turn:
+                self._turn = angle
+            elif angle < turn - self.band:
+                self._direction, self._turn = 'flex', angle
+        if self._direction == 'flex':
+            self.flex += 1
+        else:
+            self.extend += 1
+
+    def _record(self):
+        names = self.counter.angle_names
+        record = {'rep': self.rep, 'end': self.frame - 1, 'frames': self.frame - self.start,
+                  'flex_frames': self.flex, 'extend_frames': self.extend,
+                  'rom': round(float(self.rep_high - self.rep_low), 1),
+                  'min': {name: round(float(v), 1) for name, v in zip(names, self.low)},
+                  'max': {name: round(float(v), 1) for name, v in zip(names, self.high)},
+                  'straightness': None}
+        if self.straight_frames:
+            record['straightness'] = round(float(self.straight_sum / self.straight_frames), 3)
+        quality = self.counter.rep_quality(record, self.rep_low)
+        record['quality'] = None if quality is None else round(float(quality), 3)
+        return record
@@ -0,0 +1,231 @@
+"""Compact landmark recordings of counting sessions, and their replay.
+
+A recording keeps what the counter saw instead of the video: per frame
+the capture time, the (33, 4) landmarks (NaN when no pose was found),
+the count and the feedback. That is 540 bytes a frame in float32 (276 in
+float16), a third of what even a flat synthetic clip takes as MP4. float16
+keeps landmarks to about 0.3 px at 640 wide, which can move a threshold
+crossing by a frame, so replays only match exactly in float32.
+
+The file is only ever appended to. It starts with a header
+
+    b'LMRC', version (u16), reserved (u16), meta length (u32), meta JSON
+
+and is followed by chunks of up to `chunk_frames` frames, each
+
+    b'LMCK', frames (u32), events length (u32), width (u16), height (u16),
+    times (float64), counts (float32), landmarks (dtype, frames x 33 x 4),
+    feedback events JSON
+
+with the meta JSON and every chunk padded to 8 bytes. The feedback events
+are [frame, feedback] pairs for the frames where it changed. A chunk is
+written in one piece once full, so a session cut short loses at most the
+frames of its last chunk, and a torn chunk at the end is ignored on
+reading. read() memory-maps the file and the chunk arrays are views on it.
+
+replay() feeds the recorded landmarks to a fresh counter at full speed,
+with no camera and no MediaPipe, and reports where its counts or
+feedback differ from the recorded ones.
+"""
+import json
+import mmap
+import os
+import struct
+import time
+
+import numpy as np
+
+from .pose import calculate_angles
+
+MAGIC = b'LMRC'
+CHUNK_MAGIC = b'LMCK'
+VERSION = 1
+HEADER = struct.Struct('<4sHHI')
+CHUNK = struct.Struct('<4sIIHH')
+
+
+def _padding(n):
+    return -n % 8
+
+
+class Recorder:
+    """Appends a session's frames to a recording file, one chunk at a time.
+
+    `exercise` and `counter_kwargs` name the counter for replay; `meta`
+    adds anything else worth keeping (clip name, detector settings).
+    """
+
+    def __init__(self, path, exercise, counter_kwargs=None, fps=None, dtype='float32',
+                 chunk_frames=256, meta=None):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.chunk_frames = chunk_frames
+        self.meta = dict(meta or {}, exercise=exercise, counter_kwargs=counter_kwargs or {},
+                         fps=fps, dtype=self.dtype.str, started=time.time())
+        blob = json.dumps(self.meta).encode()
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, 0, len(blob)) + blob +
+                        b'\0' * _padding(HEADER.size + len(blob)))
+        self.file.flush()
+
+        self.times = np.zeros(chunk_frames, np.float64)
+        self.counts = np.zeros(chunk_frames, np.float32)
+        self.landmarks = np.zeros((chunk_frames, 33, 4), self.dtype)
+        self.events = []
+        self.size = None
+        self.pending = 0
+        self.frames = 0
+        self.feedback = None
+        self._t0 = None
+
+    def add(self, size, landmarks, count, feedback):
+        """Records one frame of (width, height) `size`; `landmarks` is None when no pose was found."""
+        now = time.perf_counter()
+        if self._t0 is None:
+            self._t0 = now
+        if self.pending and (self.pending == self.chunk_frames or size != self.size):
+            self.flush()
+        self.size = size
+        i = self.pending
+        self.times[i] = now - self._t0
+        self.counts[i] = count
+        if landmarks is None:
+            self.landmarks[i] = np.nan
+        else:
+            self.landmarks[i] = landmarks
+        # Every chunk opens with the current feedback
+        if feedback != self.feedback or i == 0:
+            self.events.append([i, feedback])
+            self.feedback = feedback
+        self.pending += 1
+        self.frames += 1
+
+    def flush(self):
+        """Appends the pending frames as one chunk."""
+        n = self.pending
+        if not n:
+            return
+        events = json.dumps(self.events).encode()
+        parts = [CHUNK.pack(CHUNK_MAGIC, n, len(events), *self.size),
+                 self.times[:n].tobytes(), self.counts[:n].tobytes(),
+                 self.landmarks[:n].tobytes(), events]
+        length = sum(len(part) for part in parts)
+        parts.append(b'\0' * _padding(length))
+        self.file.write(b''.join(parts))
+        self.file.flush()
+        self.pending = 0
+        self.events = []
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Recording:
+    """A recording read back: its meta and a list of chunks.
+
+    Every chunk is a dict of `size`, `times`, `counts`, `landmarks` (views
+    on the mapped file) and `events`. `truncated` is set when the file
+    ends in a torn chunk.
+    """
+
+    def __init__(self, meta, chunks, truncated=False, nbytes=0):
+        self.meta = meta
+        self.chunks = chunks
+        self.truncated = truncated
+        self.nbytes = nbytes
+
+    @property
+    def frames(self):
+        return sum(len(chunk['times']) for chunk in self.chunks)
+
+    @property
+    def duration(self):
+        return float(self.chunks[-1]['times'][-1]) if self.chunks else 0.0
+
+    def frame_feedback(self, chunk):
+        """Returns the feedback of every frame of a chunk, from its change events."""
+        feedback = [None] * len(chunk['times'])
+        for (start, value), nxt in zip(chunk['events'], chunk['events'][1:] + [[len(feedback)]]):
+            feedback[start:nxt[0]] = [value] * (nxt[0] - start)
+        return feedback
+
+
+def read(path):
+    """Memory-maps a recording and returns it as a Recording."""
+    with open(path, 'rb') as f:
+        nbytes = os.fstat(f.fileno()).st_size
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, _, meta_len = HEADER.unpack_from(buf, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} landmark recording")
+    meta = json.loads(bytes(buf[HEADER.size:HEADER.size + meta_len]))
+    dtype = np.dtype(meta['dtype'])
+    data = np.frombuffer(buf, np.uint8)
+
+    chunks = []
+    offset = HEADER.size + meta_len
+    offset += _padding(offset)
+    truncated = False
+    while offset < nbytes:
+        if offset + CHUNK.size > nbytes:
+            truncated = True
+            break
+        magic, n, events_len, width, height = CHUNK.unpack_from(buf, offset)
+        length = CHUNK.size + n * (8 + 4 + 33 * 4 * dtype.itemsize) + events_len
+        if magic != CHUNK_MAGIC or offset + length > nbytes:
+            truncated = True
+            break
+        pos = offset + CHUNK.size
+        times = data[pos:pos + 8 * n].view(np.float64)
+        pos += 8 * n
+        counts = data[pos:pos + 4 * n].view(np.float32)
+        pos += 4 * n
+        size = n * 33 * 4 * dtype.itemsize
+        landmarks = data[pos:pos + size].view(dtype).reshape(n, 33, 4)
+        pos += size
+        events = json.loads(bytes(buf[pos:pos + events_len]))
+        chunks.append({'size': (width, height), 'times': times, 'counts': counts,
+                       'landmarks': landmarks, 'events': events})
+        offset += length + _padding(length)
+    return Recording(meta, chunks, truncated, nbytes)
+
+
+def replay(recording, counter=None):
+    """Runs a counter over the recorded landmarks and compares it with the recording.
+
+    Returns a dict with the replayed count, the frame count, and the
+    frames where the replayed count or feedback first differ from the
+    recorded ones (None when they agree throughout).
+    """
+    if counter is None:
+        from . import create_counter
+        counter = create_counter(recording.meta['exercise'], **recording.meta['counter_kwargs'])
+    frame = 0
+    count_mismatch = feedback_mismatch = None
+    for chunk in recording.chunks:
+        # Pixel coordinates like findPosition, for angles that match the live run
+        points = np.trunc(chunk['landmarks'][..., :2].astype(np.float64) *
+                          np.array(chunk['size'], np.float64))
+        angles = calculate_angles(points, counter.joints)
+        found = ~np.isnan(angles).any(axis=1)
+        counts = chunk['counts'].tolist()
+        feedback = recording.frame_feedback(chunk)
+        for i, (has_pose, row) in enumerate(zip(found.tolist(), angles.tolist())):
+            if has_pose:
+                counter.update(row)
+            if count_mismatch is None and counter.count != counts[i]:
+                count_mismatch = frame + i
+            if feedback_mismatch is None and counter.feedback != feedback[i]:
+                feedback_mismatch = frame + i
+        frame += len(counts)
+    return {'count': counter.count, 'frames': frame,
+            'count_mismatch': count_mismatch, 'feedback_mismatch': feedback_mismatch}
+
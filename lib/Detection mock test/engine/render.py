@@ -0,0 +1,176 @@
+"""Rendering modes for the counters' overlays and a background video encoder.
+
+`off` draws nothing, for servers that only count. `debug` draws everything
+every frame: MediaPipe's skeleton, the joint angles and the counter's UI.
+`overlay` draws only the counter's UI, and the parts of it that change
+with the count or feedback (boxes, bar outline, text) are rendered once
+per distinct value into sprites that are blended onto later frames. Only
+what moves every frame, like the push-up depth bar, is drawn live. Text
+is the costly part of the UI, so a frame then costs a few masked copies.
+"""
+import queue
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+MODES = ('off', 'overlay', 'debug')
+
+
+class OverlayCache:
+    """A counter's overlay as sprites, one set per overlay key and frame size.
+
+    A sprite is a patch of the overlay cut around a group of drawn pixels,
+    so blending never touches the rest of the frame. Rendering the overlay
+    once on black and once on white gives every pixel's alpha, including
+    the partly covered edges of anti-aliased text. A sprite whose pixels
+    are all either covered or untouched is copied through its mask. One
+    with partly covered pixels, or any sprite when `opacity` is below 1, is
+    stored premultiplied: the frame under it is scaled by (1 - alpha) and
+    the sprite added, which matches drawing the overlay to within a level
+    of rounding.
+    """
+
+    def __init__(self, counter, opacity=1.0, size=32):
+        self.counter = counter
+        self.opacity = opacity
+        self.size = size
+        self.sprites = OrderedDict()
+        # Canvases reused by every render of a frame size
+        self._canvases = None
+        self.hits = 0
+        self.misses = 0
+
+    def draw(self, img, snapshot):
+        key = self.counter.overlay_key(snapshot)
+        if key is None:
+            self.counter.draw(img, snapshot)
+            return
+        key = (img.shape, key)
+        sprites = self.sprites.get(key)
+        if sprites is None:
+            self.misses += 1
+            sprites = self.sprites[key] = self._render(img.shape, snapshot)
+            if len(self.sprites) > self.size:
+                self.sprites.popitem(last=False)
+        else:
+            self.hits += 1
+            self.sprites.move_to_end(key)
+        for x, y, patch, mask in sprites:
+            roi = img[y:y + patch.shape[0], x:x + patch.shape[1]]
+            if mask.ndim == 2:
+                cv2.copyTo(patch, mask, roi)
+                continue
+            # The mask is 255 * (1 - alpha)
+            cv2.multiply(roi, mask, dst=roi, scale=1 / 255)
+            cv2.add(roi, patch, dst=roi)
+        self.counter.draw_live(img, snapshot)
+
+    def _render(self, shape, snapshot):
+        # On black a pixel comes out as alpha * color, on white as that plus
+        # (1 - alpha) * 255
+        if self._canvases is None or self._canvases[0].shape != shape:
+            self._canvases = (np.empty(shape, np.uint8), np.empty(shape, np.uint8))
+        black, white = self._canvases
+        black.fill(0)
+        white.fill(255)
+        self.counter.draw_static(black, snapshot)
+        self.counter.draw_static(white, snapshot)
+        diff = cv2.absdiff(black, white)
+        drawn = cv2.bitwise_not(cv2.inRange(diff, (255, 255, 255), (255, 255, 255)))
+        # Letters close together share one sprite
+        groups = cv2.dilate(drawn, np.ones((9, 9), np.uint8))
+        n, labels, stats, _ = cv2.connectedComponentsWithStats(groups)
+        sprites = []
+        for x, y, w, h, area in stats[1:].tolist():
+            window = np.s_[y:y + h, x:x + w]
+            patch, keep = black[window], diff[window]
+            if self.opacity < 1:
+                patch = cv2.multiply(patch, self.opacity)
+                keep = cv2.subtract(255, cv2.multiply(cv2.subtract(255, keep), self.opacity))
+            elif not cv2.countNonZero(cv2.inRange(keep, (1, 1, 1), (254, 254, 254))):
+                keep = cv2.inRange(keep, (0, 0, 0), (0, 0, 0))
+            sprites.append((x, y, patch.copy(), keep.copy()))
+        return sprites
+
+
+class Renderer:
+    """Draws a counter's overlay in one of MODES."""
+
+    def __init__(self, counter, mode='debug', opacity=1.0):
+        if mode not in MODES:
+            raise ValueError(f"unknown render mode {mode!r}, expected one of {list(MODES)}")
+        self.counter = counter
+        self.mode = mode
+        self.cache = OverlayCache(counter, opacity) if mode == 'overlay' else None
+
+    def draw(self, img, snapshot=None):
+        """Draws the overlay for `snapshot` (the counter's current state by default)."""
+        if self.mode == 'off':
+            return img
+        snapshot = snapshot or self.counter.snapshot()
+        if self.cache is not None:
+            self.cache.draw(img, snapshot)
+        else:
+            self.counter.draw(img, snapshot)
+        return img
+
+
+class VideoEncoder:
+    """Writes frames to a video file on a background thread.
+
+    write() hands the frame over without copying, so the caller must not
+    change it afterwards. When the encoder falls `queue_size` frames
+    behind, frames are dropped (and counted) rather than stalling the
+    caller, unless `block` is set, as it should be for file sources.
+    """
+
+    def __init__(self, path, fps=30.0, fourcc='mp4v', queue_size=32, block=False):
+        self.path = path
+        self.fps = fps
+        self.fourcc = fourcc
+        self.block = block
+        self.queue = queue.Queue(queue_size)
+        self.written = 0
+        self.dropped = 0
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def write(self, img):
+        if self.block:
+            self.queue.put(img)
+            return
+        try:
+            self.queue.put_nowait(img)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        writer = None
+        try:
+            while True:
+                img = self.queue.get()
+                if img is None:
+                    break
+                if writer is None:
+                    h, w = img.shape[:2]
+                    writer = cv2.VideoWriter(self.path, cv2.VideoWriter_fourcc(*self.fourcc),
+                                             self.fps, (w, h))
+                writer.write(img)
+                self.written += 1
+        finally:
+            if writer is not None:
+                writer.release()
+
+    def close(self):
+        """Writes out the queued frames and closes the file."""
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
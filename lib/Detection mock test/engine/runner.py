@@ -0,0 +1,179 @@
+"""The per-frame hot path and the interactive counting loop."""
+import json
+import time
+
+import cv2
+
+from .render import Renderer
+from .scheduler import frame_angles
+
+
+def capture_source(source):
+    """Returns a camera index for a source like '0', and a clip path or stream URL as given."""
+    return int(source) if str(source).isdigit() else source
+
+
+def process_frame(detector, counter, img, draw=True, flip_frame=None):
+    """Runs one pose inference on the frame and feeds the joint angles to the counter.
+
+    Returns the frame and the list of joint angles, or None for the angles
+    when no pose was found. With `draw` the skeleton (if the counter wants
+    it) and the joint angles are drawn; the counter's own overlay is left
+    to the caller. With `flip_frame` (`draw` by default) the frame is
+    mirrored in place when the counter asks for it. The angles are those
+    of the mirrored frame either way.
+    """
+    prof = detector.profiler
+    if flip_frame is None:
+        flip_frame = draw
+    # Inference runs on the frame as captured with the landmarks mirrored,
+    # and only a frame that is drawn on gets flipped, in place
+    detector.findPose(img, draw and counter.draw_landmarks, mirror=counter.flip)
+    if counter.flip and flip_frame:
+        cv2.flip(img, 1, dst=img)
+    if len(detector.findPosition(img, False)) == 0:
+        return img, None
+    angles = detector.findAngles(counter.joints).tolist()
+    if prof: start = prof.clock()
+    counter.update(angles)
+    if prof: prof.lap('counter', start)
+    if draw:
+        for joints, angle in zip(counter.joints, angles):
+            detector.drawAngle(img, *joints, angle)
+    return img, angles
+
+
+def startup_times(started, detector, first_frame, first_pose, first_count):
+    """Returns the startup milestones in seconds since `started`."""
+    def since(t):
+        return None if t is None else round(t - started, 3)
+    return {'first_frame': since(first_frame), 'graph_ready': since(detector.readyAt),
+            'first_pose': since(first_pose), 'first_count': since(first_count)}
+
+
+def run(cap, detector, counter, window_name=None, target=None, exit_key=None,
+        show=True, started=None, recorder=None, render=None, encoder=None, gate=None,
+        scheduler=None):
+    """Counts on a capture in a window until it ends, `target` reps are done or `exit_key` is pressed.
+
+    When the detector has profiling enabled, the stage timings are drawn
+    on the frame and logged as a JSON line every few seconds. At the
+    first count a `startup` JSON line gives the seconds from `started`
+    (engine import by default) to the first frame, the warm graph, the
+    first pose and the first count. Every finished rep's quality record
+    (engine/quality.py) is printed as a `rep` JSON line. With a Recorder
+    every frame's landmarks, count and feedback are recorded.
+
+    `render` is one of render.MODES, `debug` when showing the window and
+    `off` otherwise by default. With a VideoEncoder the rendered frames
+    are also written to a video file. With a PresenceGate, frames are
+    only inferred while someone may be in view, and while the gate is
+    idle most frames are grabbed without being decoded, and so are not
+    shown, recorded or written. With an AdaptiveScheduler
+    (engine/scheduler.py) only key frames are inferred and the frames in
+    between are counted on interpolated landmarks. Those are known once
+    the next key frame is, so frames are counted, shown and written up to
+    the scheduler's `max_stride` frames late, and without the skeleton
+    and angles of `debug`. A gate and a scheduler cannot be combined.
+    Returns the final count.
+    """
+    if gate is not None and scheduler is not None:
+        raise ValueError('a presence gate and a frame scheduler cannot be combined')
+    if started is None:
+        from . import STARTED as started
+    window_name = window_name or counter.window_name
+    exit_key = exit_key or counter.exit_key
+    prof = detector.profiler
+    renderer = Renderer(counter, render or ('debug' if show else 'off'))
+    debug = renderer.mode == 'debug'
+    last_count = counter.count
+    reps = len(counter.metrics.records)
+    first_frame = first_pose = None
+
+    def finish(img, angles, landmarks):
+        """Records, reports and shows a counted frame; returns True to stop."""
+        nonlocal first_pose, last_count, reps
+        if first_pose is None and angles is not None:
+            first_pose = time.perf_counter()
+        if recorder is not None:
+            h, w = img.shape[:2]
+            recorder.add((w, h), landmarks, counter.count, counter.feedback)
+        if counter.count != last_count:
+            if last_count == 0:
+                times = startup_times(started, detector, first_frame, first_pose,
+                                      time.perf_counter())
+                print('startup', json.dumps(times))
+            last_count = counter.count
+            print(f"{counter.name} count: {counter.count:g}")
+            for record in counter.metrics.records[reps:]:
+                print('rep', json.dumps(record))
+            reps = len(counter.metrics.records)
+        if renderer.mode != 'off':
+            if prof: start = prof.clock()
+            renderer.draw(img)
+            if prof:
+                prof.lap('ui', start)
+                if debug:
+                    prof.draw(img)
+        if encoder is not None:
+            encoder.write(img)
+        if show:
+            cv2.imshow(window_name, img)
+        if prof:
+            line = prof.periodic_log()
+            if line:
+                print(line)
+        if target is not None and counter.count >= target:
+            print('your task will be completed')
+            return True
+        return show and cv2.waitKey(1) & 0xFF == ord(exit_key)
+
+    def finish_scheduled(frames):
+        """Counts the frames the scheduler finalized, in order; returns True to stop."""
+        for index, img, landmarks in frames:
+            angles = None
+            if landmarks is not None:
+                angles = frame_angles(landmarks, img.shape, counter.joints).tolist()
+                counter.update(angles)
+            if counter.flip and renderer.mode != 'off':
+                cv2.flip(img, 1, dst=img)
+            if finish(img, angles, landmarks):
+                return True
+        return False
+
+    stop = False
+    while not stop and cap.isOpened():
+        if gate is not None and gate.skip():
+            if not cap.grab():
+                break
+            if show and cv2.waitKey(1) & 0xFF == ord(exit_key):
+                break
+            continue
+        success, img = cap.read()
+        if not success:
+            break
+        if first_frame is None:
+            first_frame = time.perf_counter()
+        if scheduler is not None:
+            stop = finish_scheduled(scheduler.push(img))
+            continue
+        if gate is None or gate.check(img):
+            img, angles = process_frame(detector, counter, img, draw=debug,
+                                        flip_frame=renderer.mode != 'off')
+            if gate is not None:
+                gate.observe(angles is not None)
+        else:
+            angles = None
+            if counter.flip and renderer.mode != 'off':
+                cv2.flip(img, 1, dst=img)
+        stop = finish(img, angles, None if angles is None else detector.landmarks)
+    if scheduler is not None and not stop:
+        finish_scheduled(scheduler.flush())
+    cap.release()
+    if recorder is not None:
+        recorder.close()
+    if encoder is not None:
+        encoder.close()
+    if show:
+        cv2.destroyAllWindows()
+    return counter.count
@@ -0,0 +1,115 @@
+"""Adaptive frame skipping around poseDetector.
+
+Rep counting only needs dense inference while a joint angle is close to
+one of the counting thresholds. AdaptiveScheduler infers on a key frame,
+estimates how many frames the watched angles need to reach the nearest
+threshold at their current angular velocity, and skips up to that many
+frames (never more than `max_stride`). Near a threshold, or when no pose
+is found, it infers on every frame. Skipped frames get landmarks
+linearly interpolated between the key frames around them, so they are
+emitted when the next key frame is inferred: up to `max_stride` frames
+late. A live run shows the camera that much behind.
+
+The thresholds come from each counter's watched_angles(). engine.run
+drives a counter through a scheduler with `scheduler=`, and
+`python -m engine --skip N` turns that on; `python frame_scheduler.py`
+compares a clip against full-rate inference.
+"""
+import numpy as np
+
+from .pose import calculate_angles
+
+
+class AdaptiveScheduler:
+    """Runs a poseDetector at a stride chosen from joint angular velocity."""
+
+    def __init__(self, detector, joints, thresholds, max_stride=4, near=3.0,
+                 safety=0.5, mirror=False):
+        self.detector = detector
+        # Landmarks of the mirrored frame, like the sit-up scripts use
+        self.mirror = mirror
+        self.joints = joints
+        self.thresholds = [np.asarray(t, np.float64) for t in thresholds]
+        self.max_stride = max_stride
+        # Always infer when an angle is within `near` degrees of a threshold
+        self.near = near
+        # Only skip this fraction of the frames predicted before a crossing
+        self.safety = safety
+
+        self.index = 0
+        self.next_key = 0
+        self.inferred = 0
+        # Skipped (index, frame) pairs waiting for the next key frame
+        self.pending = []
+        # Last key frame as (index, landmarks or None, angles or None)
+        self.key = None
+
+    @classmethod
+    def for_counter(cls, detector, counter, max_stride=4, **kwargs):
+        """Returns a scheduler watching a counter's joints against its thresholds."""
+        return cls(detector, counter.joints, counter.watched_angles(), max_stride,
+                   mirror=counter.flip, **kwargs)
+
+    def push(self, img):
+        """Feeds the next frame and returns the (index, frame, landmarks) triples now final.
+
+        Landmarks are (33, 4) arrays like poseDetector.landmarks, or None
+        when there is no pose for that frame. Frames come back in order,
+        each one as it was pushed.
+        """
+        index = self.index
+        self.index += 1
+        if index < self.next_key:
+            self.pending.append((index, img))
+            return []
+        return self._infer(index, img)
+
+    def flush(self):
+        """Finalizes the frames still waiting at the end of the stream."""
+        if not self.pending:
+            return []
+        index, img = self.pending.pop()
+        return self._infer(index, img)
+
+    def _infer(self, index, img):
+        self.detector.findPose(img, False, self.mirror)
+        self.inferred += 1
+        landmarks = angles = None
+        if self.detector.results.pose_landmarks:
+            landmarks = self.detector.landmarks.copy()
+            self.detector.findPosition(img, False)
+            angles = self.detector.findAngles(self.joints)
+
+        out = self._interpolate(index, landmarks)
+        out.append((index, img, landmarks))
+        self.next_key = index + self._stride(index, angles)
+        self.key = (index, landmarks, angles)
+        return out
+
+    def _interpolate(self, index, landmarks):
+        out = []
+        key_index, key_landmarks = self.key[:2] if self.key else (None, None)
+        for i, img in self.pending:
+            if key_landmarks is None or landmarks is None:
+                out.append((i, img, None))
+            else:
+                t = (i - key_index) / (index - key_index)
+                out.append((i, img, key_landmarks + (landmarks - key_landmarks) * t))
+        self.pending = []
+        return out
+
+    def _stride(self, index, angles):
+        if angles is None or self.key is None or self.key[2] is None:
+            return 1
+        velocity = np.abs(angles - self.key[2]) / (index - self.key[0])
+        distance = np.array([np.abs(a - t).min() for a, t in zip(angles, self.thresholds)])
+        if (distance < self.near).any():
+            return 1
+        frames_to_cross = (distance / np.maximum(velocity, 1e-6)).min()
+        return int(np.clip(frames_to_cross * self.safety, 1, self.max_stride))
+
+
+def frame_angles(landmarks, shape, joints):
+    """Returns the joint angles of a frame's landmarks in pixels, like findPosition and findAngles."""
+    h, w = shape[:2]
+    return calculate_angles(np.trunc(landmarks[:, :2] * (w, h)), joints)
@@ -0,0 +1,108 @@
+"""Sit-up counting on the shoulder-hip-knee angle."""
+import cv2
+import numpy as np
+
+from .counter import RepCounter
+
+# Shoulder (11) - hip (23) - knee (25)
+SITUP_JOINTS = (11, 23, 25)
+# Lying back past this angle arms the rep
+DOWN_ANGLE = 117
+# Curling up past this angle counts the rep. The old scripts tested
+# `angle <= 89 or angle <= 102`, which is the same as `angle <= 102`.
+UP_ANGLE = 102
+
+
+def update_stage_and_count(angle, stage, counter, down_angle=DOWN_ANGLE, up_angle=UP_ANGLE):
+    """Updates the stage and count based on the shoulder-hip-knee angle."""
+    if angle >= down_angle:
+        stage = "down"
+    if angle <= up_angle and stage == "down":
+        stage = "up"
+        counter += 1
+    return stage, counter
+
+
+def count_clip(angles, stage=0, down_angle=DOWN_ANGLE, up_angle=UP_ANGLE):
+    """Counts a whole clip at once, matching update_stage_and_count frame by frame.
+
+    Takes the per-frame shoulder-hip-knee angles (frames with a pose only)
+    and returns the count and the frame index of every rep.
+    """
+    angles = np.asarray(angles, np.float64)
+    # Each frame can set the stage to "down" (1) and then to "up" (0)
+    labels = np.stack([np.where(angles >= down_angle, 1, -1),
+                       np.where(angles <= up_angle, 0, -1)], axis=1).ravel()
+    frames = np.repeat(np.arange(len(angles)), 2)
+    keep = labels >= 0
+    labels, frames = labels[keep], frames[keep]
+    # A rep is every "down" to "up" step
+    prev = np.concatenate(([1 if stage == "down" else 0], labels[:-1]))
+    reps = frames[(prev == 1) & (labels == 0)]
+    return len(reps), reps
+
+
+def draw_ui(img, counter, stage):
+    """Draws the count, stage and exit hint on the image."""
+    cv2.putText(img, f'Count: {counter}', (10, 50),
+                cv2.FONT_HERSHEY_COMPLEX, 2, (0, 255, 255), 2)
+    cv2.putText(img, f'Stage: {stage}', (10, 100),
+                cv2.FONT_HERSHEY_COMPLEX, 1, (0, 255, 0), 2)
+    cv2.putText(img, "Press 'x' to exit", (10, img.shape[0] - 20),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+
+
+class SitUpCounter(RepCounter):
+    """Counts a rep when the torso curls up after lying back.
+
+    `stage` is the starting stage: 0 (unknown) waits for the user to lie
+    back first, "down" counts the first curl straight away.
+    """
+    name = 'situp'
+    joints = (SITUP_JOINTS,)
+    angle_names = ('hip',)
+    # The sit-up scripts always ran on the mirrored camera image
+    flip = True
+    draw_landmarks = True
+    window_name = 'Situp Counter'
+    exit_key = 'x'
+
+    def __init__(self, stage=0, down_angle=DOWN_ANGLE, up_angle=UP_ANGLE):
+        self.initial_stage = stage
+        self.down_angle = down_angle
+        self.up_angle = up_angle
+        super().__init__()
+
+    def reset(self):
+        self.count = 0
+        self.stage = self.initial_stage
+        self.feedback = None
+        self.metrics.reset()
+
+    def update(self, angles):
+        self.stage, self.count = update_stage_and_count(
+            angles[0], self.stage, self.count, self.down_angle, self.up_angle)
+        self.feedback = self.stage
+        self.metrics.update(angles, self.count)
+        return self.feedback
+
+    def count_clip(self, angles):
+        angles = np.asarray(angles, np.float64).reshape(-1, len(self.joints))
+        return count_clip(angles[:, 0], self.initial_stage, self.down_angle, self.up_angle)
+
+    def watched_angles(self):
+        return ((self.down_angle, self.up_angle),)
+
+    def rep_quality(self, record, low):
+        # Like SitUpLogic.repQuality at the top of the curl
+        return min((90 - low) / 50.0, 1.0) if low < 90 else 0.5
+
+    def snapshot(self):
+        return {'count': self.count, 'stage': self.stage}
+
+    def draw(self, img, snapshot=None):
+        snapshot = snapshot or self.snapshot()
+        draw_ui(img, snapshot['count'], snapshot['stage'])
+
+    def overlay_key(self, snapshot):
+        return snapshot['count'], snapshot['stage']
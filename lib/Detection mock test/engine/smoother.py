@@ -0,0 +1,65 @@
+"""Landmark smoothing, mirroring PoseSmoother in lib/logic/pose_smoother.dart."""
+import numpy as np
+
+# Shoulders, elbows, wrists, hips, knees and ankles, the joints the angles use
+KEY_LANDMARKS = (11, 12, 13, 14, 15, 16, 23, 24, 25, 26, 27, 28)
+# Updates between recomputing the running sums from the ring, against float drift
+RESUM_EVERY = 1024
+
+
+class LandmarkSmoother:
+    """Weighted moving average over the last `window` frames of the landmark array.
+
+    Like PoseSmoother, the newest frame weighs `window` and the oldest 1,
+    and landmarks outside `landmarks` (all of them with None) pass through
+    untouched. The frames sit in a preallocated ring and the plain and
+    weighted sums are updated as frames enter and leave it, so every
+    update costs the same handful of array operations whatever the window.
+    """
+
+    def __init__(self, window=3, landmarks=KEY_LANDMARKS):
+        self.window = window
+        self.index = np.arange(33) if landmarks is None else np.asarray(landmarks)
+        shape = (len(self.index), 4)
+        self._ring = np.zeros((window,) + shape)
+        self._sum = np.zeros(shape)
+        self._weighted = np.zeros(shape)
+        self._out = np.zeros(shape)
+        self.reset()
+
+    def reset(self):
+        """Forgets the history, like PoseSmoother.reset (call when the person changes)."""
+        self._size = 0
+        self._head = 0
+        self._updates = 0
+        self._sum.fill(0)
+        self._weighted.fill(0)
+
+    def update(self, landmarks):
+        """Smooths a (33, 4) landmark array in place with this frame added and returns it."""
+        slot = self._ring[self._head]
+        if self._size == self.window:
+            # Every weight drops by one, which retires the oldest frame
+            self._weighted -= self._sum
+            self._sum -= slot
+        else:
+            self._size += 1
+        slot[:] = landmarks[self.index]
+        self._sum += slot
+        np.multiply(slot, self._size, out=self._out)
+        self._weighted += self._out
+        self._head = (self._head + 1) % self.window
+
+        self._updates += 1
+        if self._updates % RESUM_EVERY == 0:
+            self._resum()
+        np.divide(self._weighted, self._size * (self._size + 1) / 2, out=self._out)
+        landmarks[self.index] = self._out
+        return landmarks
+
+    def _resum(self):
+        # Oldest to newest, weighted 1 to size
+        order = (self._head - self._size + np.arange(self._size)) % self.window
+        frames = self._ring[order]
+        self._sum[:] = frames.sum(axis=0)
+        self._weighted[:] = np.tensordot(np.arange(1, self._size + 1), frames, axes=1)
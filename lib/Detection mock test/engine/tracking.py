@@ -0,0 +1,195 @@
+"""Several people in one frame, each with a stable track ID and its own counter.
+
+MediaPipe's pose solution finds one person per image. MultiPersonTracker
+finds people by running it on the full frame with everyone already
+tracked painted out, again and again until nobody new turns up. That
+search runs every `detect_every` frames, and on every frame while nobody
+is tracked. Each person found becomes a Track with its own poseDetector
+working on a crop around them. The crop follows them from frame to frame
+like poseDetector's crop mode, so the track ID stays with the person.
+Each track also has its own counter.
+
+A tracked person costs one pass of the landmark model on their crop per
+frame. MediaPipe skips its person detector while it keeps the person in
+view, and the full-frame search is paid once per `detect_every` frames
+for everyone together. With `budget`, at most that many tracks are
+inferred per frame, the stalest first. The others keep their last
+landmarks, which caps the per-frame cost however many people are in
+view. MediaPipe takes one image per call, so crops cannot be batched
+into one inference. With `workers` above 1 they are inferred side by
+side on a thread pool instead.
+"""
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from .pose import landmark_box, poseDetector
+from .runner import process_frame
+
+
+def overlap(a, b):
+    """Returns the intersection over union of two (x0, y0, x1, y1) boxes."""
+    w = min(a[2], b[2]) - max(a[0], b[0])
+    h = min(a[3], b[3]) - max(a[1], b[1])
+    if w <= 0 or h <= 0:
+        return 0.0
+    inter = w * h
+    return inter / ((a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter)
+
+
+class Track:
+    """One person: a detector following them on a crop, and their counter."""
+
+    def __init__(self, id, detector, counter, box, frame):
+        self.id = id
+        self.detector = detector
+        self.counter = counter
+        detector.roi = box
+        # Box around the person's landmarks in the frame as given
+        self.box = box
+        self.angles = None
+        self.missed = 0
+        self.first_frame = frame
+        self.last_frame = frame
+
+    def step(self, img, frame):
+        """Infers on the track's crop and updates its counter; returns whether the person was found."""
+        self.last_frame = frame
+        _, self.angles = process_frame(self.detector, self.counter, img, draw=False)
+        if self.angles is None:
+            self.missed += 1
+            return False
+        self.missed = 0
+        # Landmarks are mirrored for a counter that flips, the box is not
+        landmarks = self.detector.landmarks
+        if self.counter.flip:
+            landmarks = landmarks.copy()
+            landmarks[:, 0] = 1 - landmarks[:, 0]
+        self.box = landmark_box(landmarks, img.shape)
+        return True
+
+
+class MultiPersonTracker:
+    """Finds up to `max_people` people, tracks them and counts reps for each.
+
+    `create_counter` makes a fresh counter for every new track, and
+    `detector_kwargs` are passed to each track's poseDetector. A track is
+    dropped after `max_missed` frames without its person, or when it
+    overlaps an older track by more than `duplicate_iou`.
+    """
+
+    def __init__(self, create_counter, max_people=4, detect_every=15, budget=None,
+                 max_missed=15, duplicate_iou=0.5, workers=1, detector_kwargs=None):
+        self.create_counter = create_counter
+        self.max_people = max_people
+        self.detect_every = detect_every
+        self.budget = budget
+        self.max_missed = max_missed
+        self.duplicate_iou = duplicate_iou
+        self.detector_kwargs = dict(detector_kwargs or {})
+        # Static mode, so every search looks for a person afresh
+        self.finder = poseDetector(mode=True)
+        self.pool = ThreadPoolExecutor(workers) if workers > 1 else None
+        self.tracks = []
+        self.ids = itertools.count(1)
+        self.frame = 0
+        self._masked = None
+        # The counter of every track ever made, by ID, for the final counts
+        self.history = {}
+
+    def warmUp(self, background=True):
+        self.finder.warmUp(background)
+
+    def update(self, img):
+        """Processes one frame and returns the tracks that found their person in it."""
+        frame = self.frame
+        self.frame += 1
+        tracks = sorted(self.tracks, key=lambda t: t.last_frame)
+        if self.budget is not None:
+            tracks = tracks[:self.budget]
+        if self.pool is not None:
+            found = list(self.pool.map(lambda t: t.step(img, frame), tracks))
+        else:
+            found = [track.step(img, frame) for track in tracks]
+        seen = [track for track, ok in zip(tracks, found) if ok]
+
+        self._drop_tracks()
+        if not self.tracks or frame % self.detect_every == 0:
+            seen += self._find_people(img, frame)
+        return seen
+
+    def _drop_tracks(self):
+        kept = []
+        for track in sorted(self.tracks, key=lambda t: t.id):
+            # Two crops that drifted onto the same person: the older one stays
+            if (track.missed > self.max_missed or
+                    any(overlap(track.box, other.box) > self.duplicate_iou for other in kept)):
+                # Only the counter is kept, the graph is released
+                track.detector.close()
+                continue
+            kept.append(track)
+        self.tracks = kept
+
+    def _find_people(self, img, frame):
+        """Searches the frame for people no track follows and starts tracks for them."""
+        if len(self.tracks) >= self.max_people:
+            return []
+        self._masked = masked = cv2.copyTo(img, None, self._masked)
+        for track in self.tracks:
+            x0, y0, x1, y1 = track.box
+            masked[y0:y1, x0:x1] = 0
+        new = []
+        margin = self.detector_kwargs.get('crop_margin', 0.3)
+        while len(self.tracks) < self.max_people:
+            self.finder.findPose(masked, False)
+            if not self.finder.results.pose_landmarks:
+                break
+            box = landmark_box(self.finder.landmarks, img.shape)
+            if any(overlap(box, track.box) > 0 for track in self.tracks):
+                # Part of someone already tracked showed past the paint
+                break
+            kwargs = dict(self.detector_kwargs, crop=True, crop_fallback=False)
+            track = Track(next(self.ids), poseDetector(**kwargs), self.create_counter(),
+                          landmark_box(self.finder.landmarks, img.shape, margin), frame)
+            track.box = box
+            self.tracks.append(track)
+            self.history[track.id] = track.counter
+            new.append(track)
+            x0, y0, x1, y1 = box
+            masked[y0:y1, x0:x1] = 0
+        return new
+
+    def counts(self):
+        """Returns {track ID: count} for every track so far, dropped ones included."""
+        return {id: counter.count for id, counter in self.history.items()}
+
+    def draw(self, img, flipped=False):
+        """Draws every live track's box, ID, count and feedback.
+
+        With `flipped` the boxes are mirrored to match a frame flipped
+        for display.
+        """
+        w = img.shape[1]
+        for track in self.tracks:
+            x0, y0, x1, y1 = track.box
+            if flipped:
+                x0, x1 = w - x1, w - x0
+            color = (0, 200, 0) if track.missed == 0 else (0, 0, 200)
+            cv2.rectangle(img, (x0, y0), (x1, y1), color, 2)
+            label = f"#{track.id} {track.counter.count:g}"
+            if track.counter.feedback:
+                label += f" {track.counter.feedback}"
+            cv2.rectangle(img, (x0, max(y0 - 22, 0)), (x0 + 12 * len(label), max(y0, 22)),
+                          color, cv2.FILLED)
+            cv2.putText(img, label, (x0 + 3, max(y0 - 5, 17)), cv2.FONT_HERSHEY_PLAIN, 1.3,
+                        (255, 255, 255), 1)
+        return img
+
+    def close(self):
+        """Stops the pool and releases the graphs of the live tracks and the search."""
+        if self.pool is not None:
+            self.pool.shutdown()
+        for track in self.tracks:
+            track.detector.close()
+        self.finder.close()
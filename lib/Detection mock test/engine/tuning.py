@@ -0,0 +1,88 @@
+"""Per-machine detector settings: the calibration profile and runtime step-down.
+
+`python calibrate.py` measures pose detectors of each model complexity
+and input scale on this machine, and writes the profile to PROFILE_PATH
+(or $MOVEIT_DETECTOR_PROFILE):
+
+    {"target_fps": 20, "detector": {"complexity": 1, "scale": 1.0},
+     "ladder": [{"complexity": 1, "scale": 1.0}, {"complexity": 1, "scale": 0.5}, ...],
+     "results": [...], "machine": {...}, "created": ...}
+
+`detector` is the most accurate setting that held `target_fps`, and
+shared_detector() starts from it. `ladder` runs from there through ever
+faster settings. StepDownTuner moves the detector one rung down when
+findPose falls below the target over a whole window of frames, as on a
+machine that is busier than it was when calibrated. It never steps back
+up: a setting that was too slow once is likely to be again.
+"""
+import json
+import os
+
+PROFILE_PATH = os.environ.get('MOVEIT_DETECTOR_PROFILE') or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.detector_profile.json')
+
+
+def load_profile(path=None):
+    """Returns the calibration profile, or None when there is none or it cannot be read."""
+    path = path or PROFILE_PATH
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"ignoring detector profile {path}: {e}")
+        return None
+
+
+def save_profile(profile, path=None):
+    """Writes the calibration profile atomically."""
+    path = path or PROFILE_PATH
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(profile, f, indent=2)
+    os.replace(tmp, path)
+
+
+class StepDownTuner:
+    """Moves a detector down a ladder of settings while it misses `target_fps`.
+
+    Fed the duration of every findPose. Once `window` frames have been
+    seen at the current rung and their rate is below `tolerance` times
+    the target, the detector is reconfigured with the next rung. The
+    first frame after a change, which waits for a new graph, is not
+    counted.
+    """
+
+    def __init__(self, detector, ladder, target_fps, window=90, tolerance=0.85):
+        self.detector = detector
+        self.ladder = ladder
+        self.target_fps = target_fps
+        self.window = window
+        self.tolerance = tolerance
+        self.level = 0
+        self.changes = []
+        self._frames = 0
+        self._seconds = 0.0
+        self._skip = 0
+
+    def observe(self, seconds):
+        if self._skip:
+            self._skip -= 1
+            return
+        self._frames += 1
+        self._seconds += seconds
+        if self._frames < self.window:
+            return
+        fps = self._frames / self._seconds
+        self._frames = 0
+        self._seconds = 0.0
+        if fps >= self.target_fps * self.tolerance or self.level + 1 >= len(self.ladder):
+            return
+        self.level += 1
+        settings = self.ladder[self.level]
+        self.detector.reconfigure(**settings)
+        self._skip = 1
+        self.changes.append({'fps': round(fps, 1), 'settings': settings})
+        print(f"detector at {fps:.1f} fps, below {self.target_fps:g}; "
+              f"stepping down to {json.dumps(settings)}")
@@ -0,0 +1,356 @@
+"""Accuracy against speed of detector and pipeline settings, on a labeled corpus.
+
+Usage:
+    python evaluate.py --build CORPUS_DIR
+    python evaluate.py CORPUS_DIR [--config c1 c1-adaptive4 ...] [--out evaluation.json]
+                       [--accept NAME] [--reference c1] [--timing-tolerance 50]
+
+A corpus is a directory with a manifest.json listing items:
+
+    [{"name": "pushup-drift", "exercise": "pushup", "source": "pushup-drift.mp4",
+      "rep_times": [2.267, 4.267, ...], "counter_kwargs": {}}, ...]
+
+`source` is a clip or a landmark recording (engine/recording.py), and
+`rep_times` the seconds at which each rep completes. Real sessions are
+labeled by hand. `--build` writes a synthetic corpus: push-up clips of
+the figure from synthetic.py, and push-up and sit-up landmark recordings
+with jitter, all labeled from the angles they were drawn with.
+
+Every configuration in CONFIGS runs every item. Clips go through a
+detector with the configuration's settings, recordings through the
+counter only, so detector settings apply to clips alone. `adaptive` runs
+the frames through engine.scheduler.AdaptiveScheduler with that
+`max_stride`, as `python -m engine --skip N` does: key frames are picked
+from how fast the joints move and the frames in between are counted on
+interpolated landmarks. On a recording its key frames take the recorded
+landmarks instead of inferring. `stride` is the naive baseline, which
+infers one frame in that many, grabs the rest without decoding and gives
+them no pose. `smoothing` averages landmarks over that many frames. Per
+configuration the table gives:
+- the total absolute count error and the items counted exactly;
+- the mean absolute error of the rep times, pairing predicted and
+  labeled reps in order;
+- throughput over the clips, decoding included;
+- whether it is on the Pareto front: no other configuration is at least
+  as fast with no larger count and timing errors. A configuration that
+  paired no reps has the worst timing error, not none.
+Configurations that cannot run, such as models that fail to download,
+are listed with their error.
+
+With `--accept NAME` the exit status is 1 unless NAME counts no worse
+than `--reference` and its timing error is within `--timing-tolerance`
+ms of the reference's, so a faster setting is taken or turned down on
+data.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+import engine
+from engine.pose import calculate_angles
+from engine.scheduler import AdaptiveScheduler, frame_angles
+import synthetic
+
+# Detector settings (clips only) and pipeline options of each configuration
+CONFIGS = {
+    'c1': {'detector': {'complexity': 1}},
+    'c0': {'detector': {'complexity': 0}},
+    'c2': {'detector': {'complexity': 2}},
+    'c1-half': {'detector': {'complexity': 1, 'scale': 0.5}},
+    'c1-crop': {'detector': {'complexity': 1, 'crop': True}},
+    'c1-smooth3': {'detector': {'complexity': 1, 'smooth_landmarks': False}, 'smoothing': 3},
+    'c1-adaptive2': {'detector': {'complexity': 1}, 'adaptive': 2},
+    'c1-adaptive4': {'detector': {'complexity': 1}, 'adaptive': 4},
+    'c1-stride2': {'detector': {'complexity': 1}, 'stride': 2},
+}
+
+
+def rep_frames(counter, rows):
+    """Feeds angle rows to a counter and returns the frame of every finished rep (None rows skipped)."""
+    frames = []
+    done = 0
+    for frame, row in enumerate(rows):
+        if row is None:
+            continue
+        counter.update(row)
+        if int(counter.count) > done:
+            done = int(counter.count)
+            frames.append(frame)
+    return frames
+
+
+def build_corpus(out, fps=30):
+    """Writes the synthetic corpus and its manifest to `out`."""
+    os.makedirs(out, exist_ok=True)
+    items = []
+    for name, reps, period, drift in (('pushup-still', 3, 2.0, 0),
+                                      ('pushup-drift', 4, 2.0, 40),
+                                      ('pushup-fast', 4, 1.5, 20)):
+        path = os.path.join(out, name + '.mp4')
+        synthetic.write_clip(path, reps, fps, period, drift=drift)
+        n = synthetic.clip_frames(reps, fps, period)
+        elbow = synthetic.rep_angles(n, fps, reps, period)
+        # The figure's shoulder and hip stay in good form
+        truth = np.stack([elbow, np.full(n, 60.0), np.full(n, 175.0)], axis=1)
+        frames = rep_frames(engine.create_counter('pushup'), truth.tolist())
+        items.append({'name': name, 'exercise': 'pushup', 'source': name + '.mp4',
+                      'rep_times': [round(f / fps, 3) for f in frames], 'counter_kwargs': {}})
+
+    for name, exercise, make, reps, noise in (
+            ('pushup-jitter', 'pushup', synthetic.pushup_landmarks, 6, 0.004),
+            ('situp-jitter', 'situp', synthetic.situp_landmarks, 6, 0.004),
+            ('situp-noisy', 'situp', synthetic.situp_landmarks, 5, 0.01)):
+        clean, meta = make(reps=reps, fps=fps)
+        noisy, _ = make(reps=reps, fps=fps, noise=noise, seed=len(items))
+        size = (meta['width'], meta['height'])
+        counter = engine.create_counter(exercise)
+        joints = counter.joints
+        truth = calculate_angles(np.trunc(clean[..., :2] * size), joints).tolist()
+        frames = rep_frames(counter, truth)
+        path = os.path.join(out, name + '.lmr')
+        with engine.Recorder(path, exercise, fps=fps, meta={'synthetic': True}) as recorder:
+            for landmarks in noisy:
+                recorder.add(size, landmarks, 0, None)
+        items.append({'name': name, 'exercise': exercise, 'source': name + '.lmr',
+                      'rep_times': [round(f / fps, 3) for f in frames], 'counter_kwargs': {}})
+
+    with open(os.path.join(out, 'manifest.json'), 'w') as f:
+        json.dump(items, f, indent=2)
+    return items
+
+
+class RecordedPose:
+    """Serves a recording's landmarks to AdaptiveScheduler in place of a poseDetector.
+
+    The scheduler is pushed frame indices instead of frames. The recorded
+    landmarks are those the counter was fed, already mirrored for a
+    mirrored counter, so `mirror` is ignored.
+    """
+
+    def __init__(self, landmarks, size):
+        self.frames = landmarks
+        self.size = size
+        self.landmarks = None
+        self.results = None
+        self.points = None
+
+    def findPose(self, index, draw=False, mirror=False):
+        landmarks = self.frames[index]
+        found = not np.isnan(landmarks[0, 0])
+        self.landmarks = landmarks if found else None
+        # Only results.pose_landmarks is looked at
+        self.results = argparse.Namespace(pose_landmarks=found)
+
+    def findPosition(self, index, draw=False):
+        self.points = np.trunc(self.landmarks[:, :2] * self.size)
+        return self.points
+
+    def findAngles(self, joints):
+        return calculate_angles(self.points, joints)
+
+
+def scheduled_rows(scheduler, frames, shape, joints):
+    """Pushes frames through an AdaptiveScheduler and returns one angle row (or None) per frame."""
+    rows = []
+    def add(emitted):
+        for index, img, landmarks in emitted:
+            rows.append(None if landmarks is None else
+                        frame_angles(landmarks, shape(img), joints).tolist())
+    for img in frames:
+        add(scheduler.push(img))
+    add(scheduler.flush())
+    return rows
+
+
+def read_frames(cap):
+    """Yields a capture's frames until it ends."""
+    while True:
+        ok, img = cap.read()
+        if not ok:
+            return
+        yield img
+
+
+def clip_rows(path, counter, detector, stride, adaptive):
+    """Runs a clip through the detector, returns (angle rows, fps, seconds)."""
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    start = time.perf_counter()
+    if adaptive:
+        scheduler = AdaptiveScheduler.for_counter(detector, counter, adaptive)
+        rows = scheduled_rows(scheduler, read_frames(cap), lambda img: img.shape,
+                              counter.joints)
+    else:
+        rows = []
+        while True:
+            if len(rows) % stride:
+                if not cap.grab():
+                    break
+                rows.append(None)
+                continue
+            ok, img = cap.read()
+            if not ok:
+                break
+            img, angles = engine.process_frame(detector, counter, img, draw=False)
+            rows.append(angles)
+    seconds = time.perf_counter() - start
+    cap.release()
+    return rows, fps, seconds
+
+
+def recording_rows(path, counter, stride, adaptive, smoothing):
+    """Reads a recording's angle rows the way replay() computes them."""
+    recording = engine.read_recording(path)
+    joints = counter.joints
+    smoother = engine.LandmarkSmoother(smoothing) if smoothing else None
+    rows = []
+    for chunk in recording.chunks:
+        landmarks = chunk['landmarks'].astype(np.float64)
+        size = np.array(chunk['size'], np.float64)
+        if smoother is not None:
+            for frame in landmarks:
+                if not np.isnan(frame[0, 0]):
+                    smoother.update(frame)
+        if adaptive:
+            scheduler = AdaptiveScheduler.for_counter(RecordedPose(landmarks, size), counter,
+                                                      adaptive)
+            shape = (chunk['size'][1], chunk['size'][0])
+            rows += scheduled_rows(scheduler, range(len(landmarks)), lambda index: shape, joints)
+            continue
+        angles = calculate_angles(np.trunc(landmarks[..., :2] * size), joints)
+        for row in angles.tolist():
+            # NaN rows have no pose
+            rows.append(None if len(rows) % stride or row[0] != row[0] else row)
+    return rows, recording.meta.get('fps') or 30.0
+
+
+def evaluate_item(item, corpus, config):
+    """Runs one item under one configuration and returns its result."""
+    def create_counter():
+        return engine.create_counter(item['exercise'], **item.get('counter_kwargs', {}))
+    counter = create_counter()
+    path = os.path.join(corpus, item['source'])
+    stride = config.get('stride', 1)
+    adaptive = config.get('adaptive', 0)
+    smoothing = config.get('smoothing', 0)
+    result = {'item': item['name']}
+    if path.endswith('.lmr'):
+        rows, fps = recording_rows(path, counter, stride, adaptive, smoothing)
+        frames = rep_frames(counter, rows)
+    else:
+        detector = engine.poseDetector(smoothing=smoothing, **config['detector'])
+        detector.warmUp(background=False)
+        # process_frame counts as it goes, so the reps are read off a second
+        # counter; both have the item's thresholds, which the scheduler watches
+        rows, fps, seconds = clip_rows(path, create_counter(), detector, stride, adaptive)
+        detector.close()
+        frames = rep_frames(counter, rows)
+        result.update(frames=len(rows), seconds=round(seconds, 3))
+    truth = item['rep_times']
+    times = [frame / fps for frame in frames]
+    pairs = list(zip(times, truth))
+    result.update(count=len(times), truth=len(truth), count_error=len(times) - len(truth),
+                  timing_ms=[round(abs(t - u) * 1000, 1) for t, u in pairs])
+    return result
+
+
+def summarize(results):
+    """Totals a configuration's item results."""
+    timing = [ms for r in results for ms in r['timing_ms']]
+    frames = sum(r.get('frames', 0) for r in results)
+    seconds = sum(r.get('seconds', 0) for r in results)
+    return {'count_error': sum(abs(r['count_error']) for r in results),
+            'exact': sum(r['count_error'] == 0 for r in results), 'items': len(results),
+            'timing_ms': round(float(np.mean(timing)), 1) if timing else None,
+            'fps': round(frames / seconds, 1) if seconds else None}
+
+
+def timing(summary):
+    """Returns the summary's timing error, the worst one when no reps were paired."""
+    return float('inf') if summary['timing_ms'] is None else summary['timing_ms']
+
+
+def dominates(a, b):
+    """Returns True when summary `a` is as fast and as accurate as `b` and better at one."""
+    a_key = (a['fps'] or 0, -a['count_error'], -timing(a))
+    b_key = (b['fps'] or 0, -b['count_error'], -timing(b))
+    return a_key != b_key and all(x >= y for x, y in zip(a_key, b_key))
+
+
+def pareto(summaries):
+    """Marks every summary that no other one dominates."""
+    ok = [s for s in summaries.values() if 'error' not in s]
+    for s in ok:
+        s['pareto'] = not any(dominates(other, s) for other in ok)
+
+
+def print_table(summaries):
+    print(f"{'config':<12} {'count err':>9} {'exact':>7} {'timing ms':>9} {'fps':>7}  pareto")
+    for name, s in summaries.items():
+        if 'error' in s:
+            print(f"{name:<12} {s['error']}")
+            continue
+        timing = '-' if s['timing_ms'] is None else f"{s['timing_ms']:.1f}"
+        fps = '-' if s['fps'] is None else f"{s['fps']:.1f}"
+        print(f"{name:<12} {s['count_error']:>9} {s['exact']:>3}/{s['items']:<3} {timing:>9} "
+              f"{fps:>7}  {'*' if s['pareto'] else ''}")
+
+
+def accept(summaries, name, reference, tolerance):
+    """Returns whether `name` counts no worse than `reference` within the timing tolerance."""
+    s, ref = summaries[name], summaries[reference]
+    if 'error' in s or 'error' in ref:
+        return False
+    return (s['count_error'] <= ref['count_error'] and
+            timing(s) <= timing(ref) + tolerance)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('corpus', nargs='?', help='corpus directory with a manifest.json')
+    parser.add_argument('--build', metavar='DIR', help='write the synthetic corpus here')
+    parser.add_argument('--config', nargs='+', choices=sorted(CONFIGS), default=list(CONFIGS))
+    parser.add_argument('--out', default='evaluation.json')
+    parser.add_argument('--accept', metavar='NAME', choices=sorted(CONFIGS),
+                        help='exit 1 unless NAME is as accurate as --reference')
+    parser.add_argument('--reference', default='c1', choices=sorted(CONFIGS))
+    parser.add_argument('--timing-tolerance', type=float, default=50.0, help='ms')
+    args = parser.parse_args()
+
+    if args.build:
+        items = build_corpus(args.build)
+        print(f"wrote {len(items)} items to {args.build}")
+        if not args.corpus:
+            return
+    if not args.corpus:
+        parser.error('no corpus given')
+    with open(os.path.join(args.corpus, 'manifest.json')) as f:
+        items = json.load(f)
+    names = list(dict.fromkeys(args.config + [n for n in (args.accept, args.reference) if n]))
+
+    results, summaries = {}, {}
+    for name in names:
+        try:
+            results[name] = [evaluate_item(item, args.corpus, CONFIGS[name]) for item in items]
+        except Exception as e:
+            summaries[name] = {'error': repr(e)}
+            continue
+        summaries[name] = summarize(results[name])
+    pareto(summaries)
+    print_table(summaries)
+    with open(args.out, 'w') as f:
+        json.dump({'configs': CONFIGS, 'summaries': summaries, 'results': results}, f, indent=2)
+
+    if args.accept:
+        ok = accept(summaries, args.accept, args.reference, args.timing_tolerance)
+        print(f"{args.accept} {'accepted' if ok else 'rejected'} against {args.reference}")
+        sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Compares adaptive frame skipping with full-rate inference on a clip.
+
+Usage:
+    python frame_scheduler.py CLIP [--exercise pushup|situp|pullup] [--max-stride 4]
+
+The clip is counted once with inference on every frame and once through
+engine.scheduler.AdaptiveScheduler, which infers on key frames chosen
+from joint angular velocity and interpolates the landmarks in between.
+The command line prints the inferences, CPU time, count and rep frames
+of both. Live counting uses the same scheduler with
+`python -m engine EXERCISE --skip N`.
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from engine import COUNTERS, create_counter
+from engine import pose as pm
+from engine.scheduler import AdaptiveScheduler
+import landmark_cache
+
+
+def run(path, exercise, max_stride=4, detector_kwargs=None):
+    """Runs the scheduler over a clip and returns (landmarks, meta, inferred frames, CPU seconds)."""
+    detector = pm.poseDetector(**(detector_kwargs or {}))
+    scheduler = AdaptiveScheduler.for_counter(detector, create_counter(exercise), max_stride)
+    cap = cv2.VideoCapture(path)
+    frames = []
+    width = height = 0
+    start = time.process_time()
+    while cap.isOpened():
+        ret, img = cap.read()
+        if not ret:
+            break
+        height, width = img.shape[:2]
+        frames.extend(scheduler.push(img))
+    frames.extend(scheduler.flush())
+    cpu = time.process_time() - start
+    cap.release()
+
+    landmarks = np.full((len(frames), 33, 4), np.nan, np.float32)
+    for index, img, lm in frames:
+        if lm is not None:
+            landmarks[index] = lm
+    meta = {'width': width, 'height': height, 'frames': len(frames),
+            'fps': cap.get(cv2.CAP_PROP_FPS) or 30.0}
+    return landmarks, meta, scheduler.inferred, cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('clip')
+    parser.add_argument('--exercise', choices=sorted(COUNTERS), default='pushup')
+    parser.add_argument('--max-stride', type=int, default=4)
+    args = parser.parse_args()
+
+    start = time.process_time()
+    full, meta = landmark_cache.extract(args.clip, exercise=args.exercise)
+    full_cpu = time.process_time() - start
+    landmarks, meta, inferred, cpu = run(args.clip, args.exercise, args.max_stride)
+
+    counter = create_counter(args.exercise)
+    full_count, full_reps = landmark_cache.count_reps(full, meta, counter)
+    adaptive_count, adaptive_reps = landmark_cache.count_reps(landmarks, meta, counter)
+    print(f"full rate: {len(full)} inferences, {full_cpu:.1f}s CPU, count {full_count}")
+    print(f"adaptive:  {inferred} inferences, {cpu:.1f}s CPU, count {adaptive_count}")
+    print(f"rep frames full {full_reps.tolist()} adaptive {adaptive_reps.tolist()}")
+
+
+if __name__ == '__main__':
+    main()
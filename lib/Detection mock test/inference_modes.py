@@ -0,0 +1,91 @@
+"""Accuracy vs. throughput of the poseDetector inference modes on a clip.
+
+Usage:
+    python inference_modes.py CLIP [--max-frames 300] [--complexity 1]
+
+Every mode (full frame, downscaled, cropped around the person, both) runs
+over the same decoded frames. Landmark and push-up angle errors are
+measured against full-frame inference, so the table shows what each mode
+costs in accuracy for the frames/sec it gains.
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+import engine
+from engine import pose as pm
+from engine import pushup
+
+MODES = {
+    'full': {},
+    'scale 0.75': {'scale': 0.75},
+    'scale 0.5': {'scale': 0.5},
+    'crop': {'crop': True},
+    'crop + scale 0.75': {'crop': True, 'scale': 0.75},
+}
+
+
+def read_frames(path, max_frames=None):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while cap.isOpened() and (max_frames is None or len(frames) < max_frames):
+        ret, img = cap.read()
+        if not ret:
+            break
+        frames.append(img)
+    cap.release()
+    return frames
+
+
+def run_mode(frames, detector_kwargs):
+    """Returns (fps, per-frame pixel landmarks with NaN where no pose, push-up count)."""
+    detector = pm.poseDetector(**detector_kwargs)
+    points = np.full((len(frames), 33, 3), np.nan)
+    counter = engine.PushUpCounter()
+    start = time.perf_counter()
+    for i, img in enumerate(frames):
+        img, angles = engine.process_frame(detector, counter, img, draw=False)
+        if angles is not None:
+            points[i, :, :2] = detector.lmArray[:, 1:]
+            points[i, :, 2] = detector.landmarks[:, 3]
+    elapsed = time.perf_counter() - start
+    return len(frames) / elapsed, points, counter.count
+
+
+def compare(points, reference):
+    """Returns (detection rate, mean landmark error in px, mean push-up angle error)."""
+    found = ~np.isnan(points[:, 0, 0])
+    both = found & ~np.isnan(reference[:, 0, 0])
+    if not both.any():
+        return found.mean(), float('nan'), float('nan')
+    visible = reference[both, :, 2] > 0.5
+    errors = np.linalg.norm(points[both, :, :2] - reference[both, :, :2], axis=-1)
+    angles = pm.calculate_angles(points[both, :, :2], pushup.PUSHUP_JOINTS)
+    reference_angles = pm.calculate_angles(reference[both, :, :2], pushup.PUSHUP_JOINTS)
+    return found.mean(), errors[visible].mean(), np.abs(angles - reference_angles).mean()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('clip')
+    parser.add_argument('--max-frames', type=int, default=300)
+    parser.add_argument('--complexity', type=int, default=1, choices=(0, 1, 2))
+    args = parser.parse_args()
+
+    frames = read_frames(args.clip, args.max_frames)
+    h, w = frames[0].shape[:2]
+    print(f"{args.clip}: {len(frames)} frames at {w}x{h}")
+    print(f"{'mode':<20}{'fps':>8}{'detected':>10}{'lm err px':>11}{'angle err':>11}{'count':>7}")
+    reference = None
+    for name, kwargs in MODES.items():
+        fps, points, count = run_mode(frames, dict(kwargs, complexity=args.complexity))
+        if reference is None:
+            reference = points
+        detected, lm_error, angle_error = compare(points, reference)
+        print(f"{name:<20}{fps:>8.1f}{detected:>10.0%}{lm_error:>11.1f}{angle_error:>11.1f}{count:>7g}")
+
+
+if __name__ == '__main__':
+    main()
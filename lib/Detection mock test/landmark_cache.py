@@ -0,0 +1,263 @@
+"""Persistent per-frame landmark cache for re-tuning counter thresholds.
+
+Usage:
+    python landmark_cache.py CLIP --exercise pushup [--elbow-down 90]
+                             [--elbow-up 160] [--shoulder 40] [--hip 160]
+    python landmark_cache.py CLIP --exercise situp [--down 117] [--up 102]
+    python landmark_cache.py CLIP --exercise pullup
+    python landmark_cache.py --verify
+
+The first run over a clip runs MediaPipe once and stores every frame's
+(33, 4) landmark array in `.landmark_cache/<key>/landmarks.npy`. The key
+is the clip's content hash plus the exercise and the poseDetector
+settings, so changing complexity, smoothing or confidences re-runs
+inference, while changing counting thresholds only replays the cache.
+Frames with no pose are stored as NaN rows. The `.npy` file is opened
+memory-mapped.
+
+Counting uses the vectorized count_clip of each exercise. `--verify` runs
+both it and the frame-by-frame state machine of the exercise's counter
+over every cached clip and reports any clip where the counts or the
+frames the reps completed on differ.
+"""
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+from engine import COUNTERS, create_counter
+from engine import pose as pm
+from engine import pushup, situp
+
+CACHE_DIR = os.path.join(HERE, '.landmark_cache')
+# The sit-up scripts run inference on the mirrored frame
+FLIP = {name: counter.flip for name, counter in COUNTERS.items()}
+# Part of the key, bumped when extraction changes. 2: flipped clips are
+# inferred as captured with the landmarks mirrored. 3: the exercise is
+# part of the key and the meta.
+CACHE_VERSION = 3
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """Returns the sha256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def detector_settings(detector_kwargs=None):
+    """Returns every poseDetector constructor setting, defaults filled in."""
+    params = inspect.signature(pm.poseDetector.__init__).parameters
+    settings = {name: p.default for name, p in params.items() if name != 'self'}
+    settings.update(detector_kwargs or {})
+    return settings
+
+
+def cache_key(path, detector_kwargs=None, exercise='pushup'):
+    settings = dict(detector_settings(detector_kwargs), exercise=exercise,
+                    flip=FLIP[exercise], version=CACHE_VERSION)
+    blob = file_hash(path) + json.dumps(settings, sort_keys=True)
+    return hashlib.sha256(blob.encode()).hexdigest()[:32]
+
+
+def extract(path, detector_kwargs=None, exercise='pushup'):
+    """Runs the detector over a clip and returns (landmarks, meta)."""
+    flip = FLIP[exercise]
+    detector = pm.poseDetector(**(detector_kwargs or {}))
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    frames = []
+    width = height = 0
+    while cap.isOpened():
+        ret, img = cap.read()
+        if not ret:
+            break
+        height, width = img.shape[:2]
+        detector.findPose(img, False, mirror=flip)
+        if detector.results.pose_landmarks:
+            frames.append(detector.landmarks.copy())
+        else:
+            frames.append(np.full((33, 4), np.nan, np.float32))
+    cap.release()
+    landmarks = np.stack(frames) if frames else np.zeros((0, 33, 4), np.float32)
+    meta = {'clip': os.path.abspath(path), 'exercise': exercise, 'fps': fps, 'width': width,
+            'height': height, 'frames': len(frames),
+            'settings': dict(detector_settings(detector_kwargs), flip=flip)}
+    return landmarks, meta
+
+
+def load(path, detector_kwargs=None, exercise='pushup', cache_dir=CACHE_DIR):
+    """Returns the cached (landmarks, meta) for a clip, or None on a miss."""
+    entry = os.path.join(cache_dir, cache_key(path, detector_kwargs, exercise))
+    if not os.path.exists(os.path.join(entry, 'meta.json')):
+        return None
+    with open(os.path.join(entry, 'meta.json')) as f:
+        meta = json.load(f)
+    return np.load(os.path.join(entry, 'landmarks.npy'), mmap_mode='r'), meta
+
+
+def save(path, landmarks, meta, detector_kwargs=None, exercise='pushup', cache_dir=CACHE_DIR):
+    entry = os.path.join(cache_dir, cache_key(path, detector_kwargs, exercise))
+    os.makedirs(entry, exist_ok=True)
+    # meta.json is written last, so a half-written entry is never loaded
+    np.save(os.path.join(entry, 'landmarks.npy'), landmarks)
+    tmp = os.path.join(entry, 'meta.json.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp, os.path.join(entry, 'meta.json'))
+
+
+def get_landmarks(path, detector_kwargs=None, exercise='pushup', cache_dir=CACHE_DIR):
+    """Returns (landmarks, meta) from the cache, running inference on a miss."""
+    cached = load(path, detector_kwargs, exercise, cache_dir)
+    if cached is not None:
+        return cached
+    landmarks, meta = extract(path, detector_kwargs, exercise)
+    save(path, landmarks, meta, detector_kwargs, exercise, cache_dir)
+    return load(path, detector_kwargs, exercise, cache_dir)
+
+
+def pixel_points(landmarks, meta):
+    """Converts (frames, 33, 4) normalized landmarks to pixels like findPosition."""
+    scaled = landmarks[..., :2] * np.array((meta['width'], meta['height']), np.float64)
+    return np.trunc(scaled)
+
+
+def clip_angles(landmarks, meta, joints):
+    """Returns the indices of the frames with a pose and their joint angles."""
+    angles = pm.calculate_angles(pixel_points(landmarks, meta), joints)
+    found = np.flatnonzero(~np.isnan(angles).any(axis=1))
+    return found, angles[found]
+
+
+def replay(landmarks, meta, counter):
+    """Runs a counter frame by frame over cached landmarks.
+
+    Returns the count and the clip frame index of every completed rep,
+    like the vectorized counters.
+    """
+    found, angles = clip_angles(landmarks, meta, counter.joints)
+    reps = []
+    for frame, row in zip(found.tolist(), angles.tolist()):
+        done = int(counter.count)
+        counter.update(row)
+        if int(counter.count) > done:
+            reps.append(frame)
+    return counter.count, reps
+
+
+def count_reps(landmarks, meta, counter):
+    """Counts over cached landmarks with a counter's vectorized count_clip.
+
+    Returns the count and the clip frame index of every completed rep.
+    """
+    found, angles = clip_angles(landmarks, meta, counter.joints)
+    count, reps = counter.count_clip(angles)
+    return count, found[reps]
+
+
+def count_pushup(landmarks, meta, thresholds=pushup.THRESHOLDS):
+    """Counts push-ups over cached landmarks in one vectorized pass.
+
+    Returns the count and the clip frame index of every completed rep.
+    """
+    found, angles = clip_angles(landmarks, meta, pushup.PUSHUP_JOINTS)
+    count, reps = pushup.count_clip(*angles.T, thresholds=thresholds)
+    return count, found[reps]
+
+
+def count_situp(landmarks, meta, down_angle=situp.DOWN_ANGLE,
+                up_angle=situp.UP_ANGLE, stage=0):
+    """Counts sit-ups over cached landmarks in one vectorized pass."""
+    found, angles = clip_angles(landmarks, meta, situp.SITUP_JOINTS)
+    count, reps = situp.count_clip(angles[:, 0], stage, down_angle, up_angle)
+    return count, found[reps]
+
+
+def verify(cache_dir=CACHE_DIR):
+    """Checks the vectorized counters against the frame loop on every cached clip.
+
+    Returns a list of (clip, frame loop (count, reps), vectorized (count,
+    reps)) mismatches. Entries from before the exercise was kept in the
+    meta are skipped.
+    """
+    mismatches = []
+    for key in sorted(os.listdir(cache_dir)) if os.path.isdir(cache_dir) else []:
+        meta_path = os.path.join(cache_dir, key, 'meta.json')
+        if not os.path.exists(meta_path):
+            continue
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if 'exercise' not in meta:
+            continue
+        landmarks = np.load(os.path.join(cache_dir, key, 'landmarks.npy'), mmap_mode='r')
+        counter = create_counter(meta['exercise'])
+        count, reps = count_reps(landmarks, meta, counter)
+        vectorized = (count, reps.tolist())
+        expected = replay(landmarks, meta, counter)
+        if expected != vectorized:
+            mismatches.append((meta['clip'], expected, vectorized))
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('clip', nargs='?')
+    parser.add_argument('--verify', action='store_true',
+                        help='check the vectorized counters against the frame loop '
+                             'on every cached clip')
+    parser.add_argument('--exercise', choices=sorted(FLIP), default='pushup')
+    parser.add_argument('--complexity', type=int, default=1, choices=(0, 1, 2))
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    defaults = pushup.THRESHOLDS
+    parser.add_argument('--elbow-down', type=float, default=defaults['elbow_down'])
+    parser.add_argument('--elbow-up', type=float, default=defaults['elbow_up'])
+    parser.add_argument('--shoulder', type=float, default=defaults['shoulder'])
+    parser.add_argument('--hip', type=float, default=defaults['hip'])
+    parser.add_argument('--down', type=float, default=situp.DOWN_ANGLE)
+    parser.add_argument('--up', type=float, default=situp.UP_ANGLE)
+    args = parser.parse_args()
+
+    if args.verify:
+        mismatches = verify(args.cache_dir)
+        for clip, (expected, expected_reps), (count, reps) in mismatches:
+            print(f"MISMATCH {clip}: frame loop {expected} at {expected_reps}, "
+                  f"vectorized {count} at {reps}")
+        print(f"{len(mismatches)} mismatches")
+        sys.exit(1 if mismatches else 0)
+    if args.clip is None:
+        parser.error('a clip is required unless --verify is given')
+
+    detector_kwargs = {'complexity': args.complexity}
+    start = time.perf_counter()
+    cached = load(args.clip, detector_kwargs, args.exercise, args.cache_dir) is not None
+    landmarks, meta = get_landmarks(args.clip, detector_kwargs, args.exercise, args.cache_dir)
+    print(f"{'cache hit' if cached else 'extracted'}: {meta['frames']} frames "
+          f"in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    if args.exercise == 'pushup':
+        thresholds = {'elbow_down': args.elbow_down, 'elbow_up': args.elbow_up,
+                      'shoulder': args.shoulder, 'hip': args.hip}
+        count, reps = count_pushup(landmarks, meta, thresholds)
+    elif args.exercise == 'situp':
+        count, reps = count_situp(landmarks, meta, args.down, args.up)
+    else:
+        count, reps = count_reps(landmarks, meta, create_counter('pullup'))
+    elapsed = time.perf_counter() - start
+    fps = meta['frames'] / elapsed if elapsed > 0 else float('inf')
+    print(f"count {count} (counted at {fps:.0f} frames/s)")
+    print('rep times:', ' '.join(f"{frame / meta['fps']:.2f}s" for frame in reps))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Counts reps for several people in front of one camera.
+
+Usage:
+    python multi_person.py [--exercise pushup|situp|pullup] [--source 0|clip.mp4]
+                           [--max-people 4] [--detect-every 15] [--budget N]
+                           [--workers 1] [--headless]
+
+Every person found gets a track ID that stays with them and their own
+counter (engine/tracking.py). The window shows each track's box, ID and
+count. At the end the count of every track and the per-frame time are
+printed. `python synthetic.py group.mp4 --people 3` makes a clip of three
+figures doing 3, 2 and 1 push-ups.
+"""
+import argparse
+import json
+import time
+
+import cv2
+
+import engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--exercise', choices=sorted(engine.COUNTERS), default='pushup')
+    parser.add_argument('--source', default='0', help='camera index or video file')
+    parser.add_argument('--max-people', type=int, default=4)
+    parser.add_argument('--detect-every', type=int, default=15,
+                        help='frames between searches for new people')
+    parser.add_argument('--budget', type=int, help='most tracks inferred per frame')
+    parser.add_argument('--workers', type=int, default=1, help='threads inferring tracks')
+    parser.add_argument('--headless', action='store_true', help='count without a window')
+    args = parser.parse_args()
+
+    tracker = engine.MultiPersonTracker(lambda: engine.create_counter(args.exercise),
+                                        args.max_people, args.detect_every, args.budget,
+                                        workers=args.workers)
+    tracker.warmUp()
+    cap = cv2.VideoCapture(engine.capture_source(args.source))
+    flip = engine.COUNTERS[args.exercise].flip
+    counts = {}
+    times = []
+    while cap.isOpened():
+        success, img = cap.read()
+        if not success:
+            break
+        start = time.perf_counter()
+        tracker.update(img)
+        times.append(time.perf_counter() - start)
+        for id, count in tracker.counts().items():
+            if counts.get(id, 0) != count:
+                print(f"track {id} {args.exercise} count: {count:g}")
+            counts[id] = count
+        if not args.headless:
+            if flip:
+                cv2.flip(img, 1, dst=img)
+            cv2.imshow('Multi-person counter', tracker.draw(img, flip))
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+    cap.release()
+    tracker.close()
+    if not args.headless:
+        cv2.destroyAllWindows()
+
+    print(json.dumps({'frames': len(times), 'tracks': len(tracker.history),
+                      'frame_ms': engine.percentiles(times),
+                      'counts': {str(id): count for id, count in tracker.counts().items()}}))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,292 @@
+"""Pipelined real-time counter: capture, inference and render on separate threads.
+
+Usage:
+    python realtime_pipeline.py [--exercise pushup|situp|pullup] [--source 0|clip.mp4]
+                                [--headless] [--profile] [--metrics-file PATH]
+
+The capture thread reads `cv2.VideoCapture` into a small ring buffer that
+drops the oldest frame when it is full. The inference thread always takes
+the newest frame and skips any stale ones, so a slow inference never makes
+latency pile up. Rendering (overlay, `cv2.imshow`, `cv2.waitKey`) runs on
+the main thread and only draws the newest result.
+
+`--profile` times every stage (cvtColor, process, findPosition, the
+counter, draw_landmarks, the UI) into the detector's StageProfiler, draws
+the p50/p95 table on the frame and logs it as a JSON line with the stats.
+`--metrics-file` also writes the timings there as Prometheus text.
+The detector is engine.shared_detector(), with the settings and runtime
+step-down of the machine's calibration profile (`python calibrate.py`).
+"""
+import argparse
+import threading
+import time
+from collections import deque
+
+import cv2
+
+import engine
+
+
+class FrameBuffer:
+    """Bounded buffer of (frame_id, timestamp, frame) that drops the oldest frame."""
+
+    def __init__(self, size=2):
+        self.frames = deque(maxlen=size)
+        self.cond = threading.Condition()
+        self.added = 0
+        self.dropped = 0
+        self.closed = False
+
+    def put(self, item):
+        with self.cond:
+            if len(self.frames) == self.frames.maxlen:
+                self.dropped += 1
+            self.frames.append(item)
+            self.added += 1
+            self.cond.notify()
+
+    def get_latest(self, timeout=None):
+        """Returns the newest item and discards the older ones, or None when closed."""
+        with self.cond:
+            while not self.frames and not self.closed:
+                if not self.cond.wait(timeout):
+                    return None
+            if not self.frames:
+                return None
+            item = self.frames.pop()
+            self.dropped += len(self.frames)
+            self.frames.clear()
+            return item
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+
+def is_file_source(source):
+    return isinstance(source, str) and not source.isdigit()
+
+
+def capture_frames(cap, buffer, running, paced=False):
+    """Reads (frame_id, timestamp, frame) items into `buffer` while `running()` is true.
+
+    With `paced` frames are read at the clip's own frame rate, so a video
+    file behaves like a camera. The buffer is closed when the source ends.
+    """
+    interval = 1.0 / (cap.get(cv2.CAP_PROP_FPS) or 30.0) if paced else 0
+    next_time = time.perf_counter()
+    frame_id = 0
+    while running() and cap.isOpened():
+        ret, img = cap.read()
+        if not ret:
+            break
+        buffer.put((frame_id, time.perf_counter(), img))
+        frame_id += 1
+        if interval:
+            next_time += interval
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+    buffer.close()
+
+
+class CounterTask:
+    """An engine rep counter as a pipeline step, with its overlay."""
+
+    def __init__(self, counter):
+        self.counter = counter
+        self.flip = counter.flip
+        self.window_name = counter.window_name
+        self.exit_key = counter.exit_key
+
+    def step(self, detector, img):
+        """Counts on the frame and returns (frame to show, snapshot for rendering)."""
+        img, angles = engine.process_frame(detector, self.counter, img, draw=False)
+        return img, self.counter.snapshot()
+
+    def draw(self, img, snapshot):
+        self.counter.draw(img, snapshot)
+
+
+TASKS = {
+    'pushup': lambda: CounterTask(engine.PushUpCounter()),
+    # Like situp_realtime.py, the first curl counts without lying back first
+    'situp': lambda: CounterTask(engine.SitUpCounter(stage="down")),
+    'pullup': lambda: CounterTask(engine.PullUpCounter()),
+}
+
+
+class RealtimePipeline:
+    """Runs a counting task with capture, inference and render decoupled."""
+
+    def __init__(self, source, task, detector=None, buffer_size=2,
+                 draw_landmarks=True, profile=False, metrics_file=None):
+        self.source = source
+        self.task = task
+        self.detector = detector or engine.shared_detector()
+        self.profiler = self.detector.enableProfiling() if profile else self.detector.profiler
+        self.metrics_file = metrics_file
+        self.buffer = FrameBuffer(buffer_size)
+        self.draw_landmarks = draw_landmarks
+        self.running = False
+
+        # Newest inference result for the renderer
+        self.result = None
+        self.result_cond = threading.Condition()
+
+        self.frames_inferred = 0
+        self.frames_rendered = 0
+        # Inferred frames the renderer never showed because a newer one was ready
+        self.render_skipped = 0
+        self.last_count = 0
+        # Seconds from frame capture to inference result / to an updated count
+        self.latency = deque(maxlen=300)
+        self.count_latency = deque(maxlen=50)
+
+    def start(self):
+        # Build the pose graph in the background while the capture opens
+        self.detector.warmUp()
+        self.cap = self.source if isinstance(self.source, cv2.VideoCapture) \
+            else cv2.VideoCapture(self.source)
+        self.running = True
+        capture_args = (self.cap, self.buffer, lambda: self.running,
+                        is_file_source(self.source))
+        self.threads = [threading.Thread(target=capture_frames, args=capture_args, daemon=True),
+                        threading.Thread(target=self._inference_loop, daemon=True)]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        self.running = False
+        self.buffer.close()
+        with self.result_cond:
+            self.result_cond.notify_all()
+        for thread in self.threads:
+            thread.join(timeout=2)
+        self.cap.release()
+
+    def _inference_loop(self):
+        while self.running:
+            item = self.buffer.get_latest()
+            if item is None:
+                break
+            frame_id, captured_at, img = item
+            img, snapshot = self.task.step(self.detector, img)
+            done = time.perf_counter()
+            self.frames_inferred += 1
+            self.latency.append(done - captured_at)
+            if snapshot['count'] != self.last_count:
+                self.last_count = snapshot['count']
+                self.count_latency.append(done - captured_at)
+            # Synced here, the renderer draws while the next frame is inferred
+            landmarks = None
+            if self.draw_landmarks and self.detector.results.pose_landmarks:
+                landmarks = self.detector.poseLandmarks()
+            with self.result_cond:
+                if self.result is not None:
+                    self.render_skipped += 1
+                self.result = (frame_id, captured_at, img, snapshot, landmarks)
+                self.result_cond.notify()
+        self.running = False
+        with self.result_cond:
+            self.result_cond.notify_all()
+
+    def next_result(self, timeout=0.05):
+        """Waits for and takes the newest inference result, or None."""
+        with self.result_cond:
+            if self.result is None and self.running:
+                self.result_cond.wait(timeout)
+            result, self.result = self.result, None
+            return result
+
+    def render(self, result):
+        frame_id, captured_at, img, snapshot, landmarks = result
+        prof = self.profiler
+        if prof: start = prof.clock()
+        if self.draw_landmarks and landmarks:
+            self.detector.mpDraw.draw_landmarks(img, landmarks,
+                                                self.detector.mpPose.POSE_CONNECTIONS)
+            if prof: start = prof.lap('draw_landmarks', start)
+        # The task counted on the mirrored pose, only the shown frame is flipped
+        if self.task.flip:
+            cv2.flip(img, 1, dst=img)
+        self.task.draw(img, snapshot)
+        if prof:
+            prof.lap('ui', start)
+            prof.draw(img)
+        self.frames_rendered += 1
+        return img
+
+    def run(self, show=True, stats_every=5.0):
+        """Renders on the calling thread until the source ends or the exit key is pressed."""
+        self.start()
+        last_stats = time.perf_counter()
+        try:
+            while self.running:
+                result = self.next_result()
+                if result is not None:
+                    img = self.render(result)
+                    if show:
+                        cv2.imshow(self.task.window_name, img)
+                if show and cv2.waitKey(1) & 0xFF == ord(self.task.exit_key):
+                    break
+                if stats_every and time.perf_counter() - last_stats >= stats_every:
+                    last_stats = time.perf_counter()
+                    print(self.format_stats())
+                    if self.profiler:
+                        print(self.profiler.log_line())
+                        if self.metrics_file:
+                            self.profiler.write_prometheus(self.metrics_file)
+        finally:
+            self.stop()
+            if show:
+                cv2.destroyAllWindows()
+        return self.last_count
+
+    def stats(self):
+        """Frame counters and latency percentiles in milliseconds."""
+        return {
+            'captured': self.buffer.added,
+            'inferred': self.frames_inferred,
+            'rendered': self.frames_rendered,
+            'dropped': self.buffer.dropped,
+            'render_skipped': self.render_skipped,
+            'latency_ms': engine.percentiles(self.latency),
+            'count_latency_ms': engine.percentiles(self.count_latency),
+            'count': self.last_count,
+        }
+
+    def format_stats(self):
+        s = self.stats()
+        return (f"captured {s['captured']} inferred {s['inferred']} "
+                f"rendered {s['rendered']} dropped {s['dropped']} | "
+                f"latency p50 {s['latency_ms']['p50']} ms p95 {s['latency_ms']['p95']} ms | "
+                f"glass-to-count p50 {s['count_latency_ms']['p50']} ms | count {s['count']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--exercise', choices=sorted(TASKS), default='pushup')
+    parser.add_argument('--source', default='0', help='camera index or video file')
+    parser.add_argument('--buffer', type=int, default=2, help='capture ring buffer size')
+    parser.add_argument('--headless', action='store_true', help='count without a window')
+    parser.add_argument('--profile', action='store_true', help='time every processing stage')
+    parser.add_argument('--metrics-file', help='write stage timings here as Prometheus text '
+                                               '(implies --profile)')
+    args = parser.parse_args()
+
+    source = engine.capture_source(args.source)
+    pipeline = RealtimePipeline(source, TASKS[args.exercise](), buffer_size=args.buffer,
+                                profile=args.profile or bool(args.metrics_file),
+                                metrics_file=args.metrics_file)
+    pipeline.run(show=not args.headless)
+    print(pipeline.format_stats())
+    if pipeline.profiler:
+        print(pipeline.profiler.log_line())
+        if args.metrics_file:
+            pipeline.profiler.write_prometheus(args.metrics_file)
+
+
+if __name__ == '__main__':
+    main()
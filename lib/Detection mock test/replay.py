@@ -0,0 +1,56 @@
+"""Replays landmark recordings through the counters, without camera or MediaPipe.
+
+Usage:
+    python replay.py SESSION.lmr [SESSION.lmr ...] [--exercise pushup]
+
+Recordings come from `python -m engine EXERCISE --record SESSION.lmr`,
+`python -m Pushup.PushUpCounter --record` or `python -m
+Situp.situp_realtime --record` (format in engine/recording.py). Each one is
+fed frame by frame to a fresh counter built like the recorded one, and
+its counts and feedback are checked against what was recorded. The exit
+status is 1 when any recording replays differently, so a folder of
+sessions works as a regression suite for the counting code. With
+`--exercise` the frames are counted by that counter instead and nothing
+is checked.
+"""
+import argparse
+import sys
+import time
+
+import engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('recordings', nargs='+')
+    parser.add_argument('--exercise', choices=sorted(engine.COUNTERS),
+                        help='count with this counter instead of the recorded one')
+    args = parser.parse_args()
+
+    failed = 0
+    for path in args.recordings:
+        recording = engine.read_recording(path)
+        meta, frames = recording.meta, recording.frames
+        print(f"{path}: {meta['exercise']}, {frames} frames over {recording.duration:.1f}s "
+              f"in {len(recording.chunks)} chunks, {recording.nbytes:,} bytes "
+              f"({recording.nbytes / max(frames, 1):.0f} per frame, {meta['dtype']})"
+              + (', torn last chunk ignored' if recording.truncated else ''))
+        counter = engine.create_counter(args.exercise) if args.exercise else None
+        start = time.perf_counter()
+        result = engine.replay(recording, counter)
+        elapsed = time.perf_counter() - start
+        recorded = float(recording.chunks[-1]['counts'][-1]) if recording.chunks else 0
+        print(f"  count {result['count']:g} (recorded {recorded:g}) "
+              f"at {frames / elapsed if elapsed > 0 else float('inf'):,.0f} frames/s")
+        if args.exercise:
+            continue
+        for what in ('count', 'feedback'):
+            frame = result[f'{what}_mismatch']
+            if frame is not None:
+                print(f"  MISMATCH {what} differs from frame {frame}")
+                failed += 1
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+"""Headless multi-stream counting service.
+
+Usage:
+    python stream_server.py pushup:0 situp:1 pushup:clip.mp4 ...
+                            [--workers N] [--port 8080] [--complexity 1]
+    python stream_server.py --config streams.json
+
+Every stream is `exercise:source`, optionally `name=exercise:source`, where
+source is a camera index or a video file (files are paced at their own
+frame rate and loop with --loop). A config file holds a JSON list of
+{"name", "exercise", "source"} objects.
+
+Each stream has a capture thread that keeps only its newest frames. A
+fixed pool of inference workers serves the streams round robin, always
+on the newest frame, so a busy stream cannot starve the others. A stream
+is processed by one worker at a time, and it keeps its own poseDetector
+and counter state: MediaPipe's tracking is per graph and cannot be shared
+between feeds. Every stream's detector starts from the machine's
+calibration profile (`python calibrate.py`) and steps down on its own
+when it falls behind, unless --complexity is given. Counts, feedback
+and per-stream fps are served as JSON on
+http://127.0.0.1:<port>/streams (and /streams/<name>).
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+
+import engine
+from realtime_pipeline import TASKS, FrameBuffer, capture_frames, is_file_source
+
+
+class Stream:
+    """One camera or clip with its own capture buffer, detector and counter."""
+
+    def __init__(self, name, exercise, source, detector_kwargs=None, loop=False):
+        self.name = name
+        self.exercise = exercise
+        self.source = engine.capture_source(source)
+        self.detector_kwargs = detector_kwargs or {}
+        self.loop = loop
+        self.task = TASKS[exercise]()
+        self.buffer = FrameBuffer(2)
+        self.detector = None
+        self.running = False
+        self.processed = 0
+        self.snapshot = {'count': 0}
+        # Completion times of recent inferences, for the fps estimate
+        self.times = deque(maxlen=60)
+
+    def start(self):
+        # The graph is built in the background while the source opens
+        self.detector = engine.profiled_detector(**self.detector_kwargs)
+        self.detector.warmUp()
+        self.running = True
+        self.thread = threading.Thread(target=self._capture, daemon=True)
+        self.thread.start()
+
+    def _capture(self):
+        while self.running:
+            cap = cv2.VideoCapture(self.source)
+            capture_frames(cap, self.buffer, lambda: self.running,
+                           paced=is_file_source(self.source))
+            cap.release()
+            if not (self.loop and is_file_source(self.source)):
+                break
+            self.buffer = FrameBuffer(2)
+        self.running = False
+
+    def has_frame(self):
+        return len(self.buffer.frames) > 0
+
+    def process(self):
+        """Runs the counter on the newest frame, called by one worker at a time."""
+        item = self.buffer.get_latest(timeout=0)
+        if item is None:
+            return
+        frame_id, captured_at, img = item
+        img, self.snapshot = self.task.step(self.detector, img)
+        self.processed += 1
+        self.times.append(time.perf_counter())
+
+    def fps(self):
+        if len(self.times) < 2:
+            return 0.0
+        return (len(self.times) - 1) / (self.times[-1] - self.times[0])
+
+    def status(self):
+        snapshot = {k: v for k, v in self.snapshot.items() if k != 'elbow'}
+        return dict(snapshot, name=self.name, exercise=self.exercise,
+                    source=self.source, running=self.running,
+                    fps=round(self.fps(), 1), processed=self.processed,
+                    captured=self.buffer.added, dropped=self.buffer.dropped)
+
+
+class StreamServer:
+    """Schedules many streams over a fixed pool of inference workers."""
+
+    def __init__(self, streams, workers=2):
+        self.streams = streams
+        self.workers = workers
+        # Streams in round-robin order; a stream leaves it while a worker has it
+        self.queue = deque(streams)
+        self.cond = threading.Condition()
+        self.running = False
+
+    def start(self):
+        self.running = True
+        for stream in self.streams:
+            stream.start()
+        self.threads = [threading.Thread(target=self._work, daemon=True)
+                        for _ in range(self.workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        self.running = False
+        for stream in self.streams:
+            stream.running = False
+        with self.cond:
+            self.cond.notify_all()
+
+    def _next_stream(self):
+        """Takes the first stream in round-robin order that has a new frame."""
+        with self.cond:
+            while self.running:
+                for _ in range(len(self.queue)):
+                    stream = self.queue.popleft()
+                    if stream.has_frame():
+                        return stream
+                    self.queue.append(stream)
+                self.cond.wait(0.005)
+            return None
+
+    def _work(self):
+        while self.running:
+            stream = self._next_stream()
+            if stream is None:
+                break
+            try:
+                stream.process()
+            except Exception as e:
+                # A broken stream is dropped without taking the worker down
+                print(f"{stream.name}: {e!r}, stream stopped")
+                stream.running = False
+                continue
+            with self.cond:
+                self.queue.append(stream)
+                self.cond.notify()
+
+    def status(self):
+        return {stream.name: stream.status() for stream in self.streams}
+
+    def serve(self, port=8080, report_every=5.0):
+        """Serves the status over HTTP and prints per-stream fps until interrupted."""
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parts = [p for p in self.path.split('/') if p]
+                status = server.status()
+                if parts == ['streams']:
+                    body = status
+                elif len(parts) == 2 and parts[0] == 'streams' and parts[1] in status:
+                    body = status[parts[1]]
+                else:
+                    self.send_error(404)
+                    return
+                data = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        httpd = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        print(f"serving http://127.0.0.1:{port}/streams")
+        try:
+            while self.running and any(stream.running for stream in self.streams):
+                time.sleep(report_every)
+                print(' | '.join(f"{s['name']}: {s['fps']} fps count {s['count']}"
+                                 for s in self.status().values()))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+            httpd.shutdown()
+
+
+def parse_stream(spec, index):
+    name, _, rest = spec.rpartition('=')
+    exercise, _, source = rest.partition(':')
+    if exercise not in TASKS or not source:
+        raise ValueError(f"bad stream {spec!r}, expected [name=]exercise:source")
+    return name or f"stream{index}", exercise, source
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('streams', nargs='*', help='[name=]exercise:source')
+    parser.add_argument('--config', help='JSON list of {"name", "exercise", "source"}')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--complexity', type=int, choices=(0, 1, 2),
+                        help="model complexity (default: the machine's profile, else 1)")
+    parser.add_argument('--loop', action='store_true', help='restart video files when they end')
+    args = parser.parse_args()
+
+    specs = []
+    if args.config:
+        with open(args.config) as f:
+            specs = [(s.get('name') or f"stream{i}", s['exercise'], s['source'])
+                     for i, s in enumerate(json.load(f))]
+    try:
+        specs += [parse_stream(spec, len(specs) + i) for i, spec in enumerate(args.streams)]
+    except ValueError as e:
+        parser.error(str(e))
+    if not specs:
+        parser.error('no streams given')
+
+    detector_kwargs = {} if args.complexity is None else {'complexity': args.complexity}
+    streams = [Stream(name, exercise, source, detector_kwargs, args.loop)
+               for name, exercise, source in specs]
+    server = StreamServer(streams, args.workers)
+    server.start()
+    server.serve(args.port)
+    print(json.dumps(server.status(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
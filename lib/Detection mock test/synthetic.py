@@ -0,0 +1,203 @@
+"""Synthetic frames and landmark fixtures for running the counters without a camera.
+
+Usage:
+    python synthetic.py OUT.mp4 [--reps 5] [--period 2.0] [--fps 30] [--people 1]
+                               [--empty SECONDS]
+
+draw_person renders a flat cartoon figure that MediaPipe detects as a
+person, with both elbows bent to a given angle, so a clip of it bending
+its arms is counted as push-ups by the push-up state machine. With
+`--people N` the clip has N figures side by side, the i-th doing i fewer
+reps than the first, for the multi-person tracker. With `--empty` the
+clip opens on the empty scene for that long before the figure walks in,
+for presence gating. The
+landmark fixtures build (frames, 33, 4) arrays shaped like
+poseDetector.landmarks straight from the joint angles, for exercising
+the counters with no inference at all. Everything is deterministic.
+"""
+import argparse
+import math
+
+import cv2
+import numpy as np
+
+SKIN = (140, 170, 220)
+SHIRT = (160, 60, 40)
+PANTS = (60, 40, 30)
+
+
+def rep_angles(frames, fps=30, reps=5, period=2.0, lo=55, hi=178, rest=0.5):
+    """Returns a per-frame joint angle going from `hi` to `lo` and back `reps` times.
+
+    The angle holds at `hi` for `rest` seconds before the first and after
+    the last rep.
+    """
+    t = np.arange(frames) / fps
+    phase = np.maximum(t - rest, 0) * 2 * math.pi / period
+    angles = (lo + hi) / 2 + (hi - lo) / 2 * np.cos(phase)
+    return np.where((t < rest) | (t > reps * period + rest), hi, angles)
+
+
+def clip_frames(reps, fps=30, period=2.0, rest=0.5):
+    """Returns the number of frames a clip of `reps` reps needs."""
+    return int((reps * period + 2 * rest) * fps)
+
+
+def draw_person(elbow_deg=170, w=640, h=480, cx=320, scale=1.0, bg=(200, 200, 200)):
+    """Renders a standing figure with both elbows bent to `elbow_deg` degrees."""
+    img = np.full((h, w, 3), bg, np.uint8)
+    s = scale
+    head = (int(cx), int(90 * s))
+    neck = (cx, int(140 * s))
+    lsh, rsh = (int(cx - 55 * s), int(150 * s)), (int(cx + 55 * s), int(150 * s))
+    lhip, rhip = (int(cx - 35 * s), int(290 * s)), (int(cx + 35 * s), int(290 * s))
+    cv2.fillPoly(img, [np.array([lsh, rsh, rhip, lhip])], SHIRT)
+
+    for hip, d in ((lhip, -1), (rhip, 1)):
+        knee = (hip[0] + int(d * 2 * s), int(370 * s))
+        ankle = (hip[0] + int(d * 4 * s), int(450 * s))
+        cv2.line(img, hip, knee, PANTS, int(30 * s))
+        cv2.line(img, knee, ankle, PANTS, int(26 * s))
+        cv2.ellipse(img, (ankle[0] + int(d * 10 * s), ankle[1] + int(8 * s)),
+                    (int(20 * s), int(9 * s)), 0, 0, 360, (20, 20, 20), -1)
+
+    # The upper arms hang out sideways and the forearms lift by the elbow angle
+    a = math.radians(180 - elbow_deg)
+    for sh, d in ((lsh, -1), (rsh, 1)):
+        u = np.array([d, 1.0]) / math.sqrt(2)
+        el = (int(sh[0] + u[0] * 78 * s), int(sh[1] + u[1] * 78 * s))
+        r = -d * a
+        f = (u[0] * math.cos(r) - u[1] * math.sin(r), u[0] * math.sin(r) + u[1] * math.cos(r))
+        wr = (int(el[0] + f[0] * 75 * s), int(el[1] + f[1] * 75 * s))
+        cv2.line(img, sh, el, SHIRT, int(26 * s))
+        cv2.line(img, el, wr, SKIN, int(20 * s))
+        cv2.circle(img, wr, int(12 * s), SKIN, -1)
+
+    cv2.line(img, neck, (cx, int(120 * s)), SKIN, int(24 * s))
+    cv2.ellipse(img, head, (int(32 * s), int(40 * s)), 0, 0, 360, SKIN, -1)
+    cv2.ellipse(img, (head[0], head[1] - int(25 * s)), (int(34 * s), int(20 * s)),
+                0, 180, 360, (30, 30, 60), -1)
+    for ex in (-12, 12):
+        cv2.circle(img, (head[0] + int(ex * s), head[1] - int(5 * s)), int(4 * s), (40, 30, 30), -1)
+    cv2.line(img, (head[0] - int(10 * s), head[1] + int(18 * s)),
+             (head[0] + int(10 * s), head[1] + int(18 * s)), (60, 60, 150), int(3 * s))
+    cv2.circle(img, (head[0], head[1] + int(5 * s)), int(3 * s), (110, 130, 190), -1)
+    return img
+
+
+def pushup_frames(reps=5, fps=30, period=2.0, w=640, h=480, drift=0, empty=0.0):
+    """Yields the frames of the figure doing `reps` elbow bends.
+
+    `drift` sways the figure sideways by that many pixels. With `empty`
+    seconds the clip first shows the scene without the figure, then the
+    figure walking in from the left over half a second.
+    """
+    for i in range(int(empty * fps)):
+        yield np.full((h, w, 3), 200, np.uint8)
+    walk = int(0.5 * fps) if empty else 0
+    for i in range(walk):
+        cx = int(-w / 4 + (w * 3 / 4) * (i + 1) / walk)
+        yield draw_person(178, w, h, cx=cx, scale=h / 480)
+    n = clip_frames(reps, fps, period)
+    for i, elbow in enumerate(rep_angles(n, fps, reps, period)):
+        cx = int(w / 2 + drift * math.sin(i / fps))
+        yield draw_person(elbow, w, h, cx=cx, scale=h / 480)
+
+
+def group_frames(people=2, reps=5, fps=30, period=2.0, w=640, h=480):
+    """Yields frames of `people` figures side by side, the i-th doing `reps - i` elbow bends."""
+    n = clip_frames(reps, fps, period)
+    bounds = np.linspace(0, w, people + 1).astype(int)
+    # Sized so the arms of neighbours stay apart
+    scale = min(h / 480, (w / people) / 420)
+    elbows = [rep_angles(n, fps, max(reps - i, 1), period) for i in range(people)]
+    for frame in range(n):
+        img = np.empty((h, w, 3), np.uint8)
+        for i in range(people):
+            x0, x1 = bounds[i], bounds[i + 1]
+            img[:, x0:x1] = draw_person(elbows[i][frame], x1 - x0, h, cx=(x1 - x0) // 2,
+                                        scale=scale)
+        yield img
+
+
+def write_clip(path, reps=5, fps=30, period=2.0, w=640, h=480, drift=0, people=1, empty=0.0):
+    """Writes a push-up clip of the figure (or `people` figures) and returns its frame count."""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (w, h))
+    n = 0
+    frames = (pushup_frames(reps, fps, period, w, h, drift, empty) if people == 1
+              else group_frames(people, reps, fps, period, w, h))
+    for img in frames:
+        writer.write(img)
+        n += 1
+    writer.release()
+    return n
+
+
+def _landmarks(points, w, h, noise, seed):
+    """Packs per-frame pixel joints {index: (frames, 2)} into normalized (frames, 33, 4)."""
+    frames = len(next(iter(points.values())))
+    landmarks = np.zeros((frames, 33, 4), np.float32)
+    # Joints that are not placed sit on the shoulder
+    landmarks[:, :, :2] = (points[11] / (w, h))[:, None]
+    for index, xy in points.items():
+        landmarks[:, index, :2] = xy / (w, h)
+    if noise:
+        rng = np.random.default_rng(seed)
+        landmarks[:, :, :2] += rng.normal(0, noise, (frames, 33, 2))
+    landmarks[:, :, 3] = 1.0
+    return landmarks
+
+
+def pushup_landmarks(reps=5, fps=30, period=2.0, w=640, h=480, noise=0.0, seed=0):
+    """Returns (landmarks, meta) for push-ups with the push-up counter's joints posed.
+
+    The elbow angle follows rep_angles, the shoulder angle is 60 degrees
+    and the hip angle about 175, so every rep is in good form. `noise` is
+    the standard deviation of normalized jitter added to every landmark.
+    """
+    n = clip_frames(reps, fps, period)
+    elbow = np.radians(rep_angles(n, fps, reps, period))
+    shoulder = np.tile((320.0, 150.0), (n, 1))
+    elbow_xy = shoulder + 80 * np.array((math.sin(math.radians(60)), math.cos(math.radians(60))))
+    # Turn the elbow-to-shoulder direction by the elbow angle to place the wrist
+    back = math.atan2(shoulder[0, 1] - elbow_xy[0, 1], shoulder[0, 0] - elbow_xy[0, 0])
+    wrist = elbow_xy + 75 * np.stack([np.cos(back - elbow), np.sin(back - elbow)], axis=1)
+    points = {11: shoulder, 13: elbow_xy, 15: wrist,
+              23: np.tile((320.0, 300.0), (n, 1)), 25: np.tile((330.0, 420.0), (n, 1))}
+    meta = {'clip': 'synthetic pushup', 'fps': fps, 'width': w, 'height': h, 'frames': n}
+    return _landmarks(points, w, h, noise, seed), meta
+
+
+def situp_landmarks(reps=5, fps=30, period=2.0, w=640, h=480, noise=0.0, seed=0):
+    """Returns (landmarks, meta) for sit-ups, the hip angle going 150 to 80 degrees and back."""
+    n = clip_frames(reps, fps, period)
+    hip_angle = np.radians(rep_angles(n, fps, reps, period, lo=80, hi=150))
+    hip = np.tile((320.0, 300.0), (n, 1))
+    shoulder = hip + 150 * np.stack([np.cos(hip_angle), -np.sin(hip_angle)], axis=1)
+    points = {11: shoulder, 23: hip, 25: np.tile((440.0, 300.0), (n, 1))}
+    meta = {'clip': 'synthetic situp', 'fps': fps, 'width': w, 'height': h, 'frames': n}
+    return _landmarks(points, w, h, noise, seed), meta
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('out')
+    parser.add_argument('--reps', type=int, default=5)
+    parser.add_argument('--period', type=float, default=2.0)
+    parser.add_argument('--fps', type=int, default=30)
+    parser.add_argument('--size', default='640x480', help='WIDTHxHEIGHT')
+    parser.add_argument('--drift', type=int, default=0, help='sideways sway in pixels')
+    parser.add_argument('--people', type=int, default=1, help='figures side by side')
+    parser.add_argument('--empty', type=float, default=0.0,
+                        help='seconds of empty scene before the figure walks in')
+    args = parser.parse_args()
+
+    w, h = (int(v) for v in args.size.split('x'))
+    n = write_clip(args.out, args.reps, args.fps, args.period, w, h, args.drift, args.people,
+                   args.empty)
+    reps = ', '.join(str(max(args.reps - i, 1)) for i in range(args.people))
+    print(f"wrote {n} frames ({reps} reps) to {args.out}")
+
+
+if __name__ == '__main__':
+    main()